@@ -1,9 +1,17 @@
 #!/usr/bin/env python3
 
+import argparse
+import shlex
 import sys
+import threading
+import time
+import traceback
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
 
 import colorama
-from nubia import Nubia, Options
+from nubia import Nubia, Options, PluginInterface
+from nubia.internal.context import Context
 
 import emtask.ced.nubia_commands
 import emtask.misc
@@ -11,18 +19,213 @@ import emtask.sql.nubia_commands
 
 colorama.init()  # allow termcolor to show colors on windows
 
+COMMAND_PACKAGES = [emtask.sql.nubia_commands, emtask.ced.nubia_commands, emtask.misc]
 
-def main():
-    shell = Nubia(
+
+class EMTaskContext(Context):
+    """nubia context keeping the args of each thread, so the lines of a
+    parallel batch read their own args from context.get_context()"""
+
+    def __init__(self):
+        self._local = threading.local()
+        self._last_args = {}
+        super(EMTaskContext, self).__init__()
+
+    @property
+    def _args(self):
+        return getattr(self._local, "args", self._last_args)
+
+    @_args.setter
+    def _args(self, args):
+        self._local.args = args
+        self._last_args = args
+
+
+class EMTaskPlugin(PluginInterface):
+    def create_context(self):
+        return EMTaskContext()
+
+    def get_opts_parser(self, add_help=True):
+        opts_parser = super(EMTaskPlugin, self).get_opts_parser(add_help=add_help)
+        opts_parser.add_argument(
+            "--profile",
+            action="store_true",
+            help="Run the command under cProfile, the stats and a summary of "
+            "the top functions are written under work/emtask/profiles. Lines "
+            "of a parallel batch run one at a time while profiled. Not "
+            "applied to commands typed in the interactive shell",
+        )
+        opts_parser.add_argument(
+            "--trace-malloc",
+            action="store_true",
+            help="Trace the command allocations with tracemalloc, the top "
+            "allocation sites are written under work/emtask/profiles. Lines "
+            "of a parallel batch are traced together, their reports include "
+            "each other's allocations. Not applied to commands typed in the "
+            "interactive shell",
+        )
+
+        return opts_parser
+
+
+BatchResult = namedtuple("BatchResult", "line code seconds error")
+
+
+class EMTaskShell(Nubia):
+    """Nubia shell that can run many command lines in the same process"""
+
+    def __init__(self, *args, **kwargs):
+        super(EMTaskShell, self).__init__(*args, **kwargs)
+        self._set_up = False
+        self._args_lock = threading.Lock()
+
+    def run_command(self, cli_args):
+        """Runs a non interactive command line, returns its exit code.
+        Logging and the terminal are only set up by the first one"""
+        with self._args_lock:
+            args = self._prepare(cli_args)
+
+        return _exit_code(self.run_cli(args))
+
+    def run_cli(self, args):
+        profile = getattr(args, "profile", False)
+        trace_malloc = getattr(args, "trace_malloc", False)
+
+        if not profile and not trace_malloc:
+            return super(EMTaskShell, self).run_cli(args)
+        from emtask.profiling import profiled
+
+        with profiled(args._cmd, profile=profile, trace_malloc=trace_malloc):
+            return super(EMTaskShell, self).run_cli(args)
+
+    def _prepare(self, cli_args):
+        if not self._set_up:
+            self._set_up = True
+
+            return self._pre_run(cli_args)
+        args = self._parse_args(cli_args)
+        self._validate_args(args)
+        self._ctx.set_args(args)
+        self._registry.set_cli_args(args)
+
+        return args
+
+    def run_batch(self, lines, keep_going=False, workers=1):
+        """Runs command lines, e.g. the lines of a script, sharing caches and
+        connections. Blank lines and lines starting with # are skipped.
+
+        It stops at the first failing line unless keep_going. With more than
+        one worker lines run concurrently, so they must not depend on each
+        other and their output may interleave. Returns a BatchResult per line
+        run, in input order"""
+        lines = [
+            line.strip()
+            for line in lines
+            if line.strip() and not line.strip().startswith("#")
+        ]
+
+        if workers <= 1:
+            results = []
+
+            for line in lines:
+                results.append(self._run_line(line))
+
+                if results[-1].code and not keep_going:
+                    break
+
+            return results
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(self._run_line, line) for line in lines]
+            results = []
+
+            for future in futures:
+                if future.cancelled():
+                    continue
+                results.append(future.result())
+
+                if results[-1].code and not keep_going:
+                    for pending in futures:
+                        pending.cancel()
+
+            return results
+
+    def _run_line(self, line):
+        start = time.perf_counter()
+        error = None
+        try:
+            code = self.run_command(["emtask"] + shlex.split(line))
+        except SystemExit as e:  # argument errors exit the parser
+            code = e.code if isinstance(e.code, int) else 1
+        except Exception as e:
+            traceback.print_exc()
+            code = 1
+            error = e
+
+        return BatchResult(line, code, time.perf_counter() - start, error)
+
+
+def format_timings(results):
+    """Table with the exit code and seconds taken by each batch line"""
+    rows = ["{:>4} {:>9}  {}".format("exit", "seconds", "command")]
+
+    for result in results:
+        rows.append(
+            "{:>4} {:>9.3f}  {}".format(result.code, result.seconds, result.line)
+        )
+    rows.append(
+        "{:>4} {:>9.3f}  {} commands, {} failed".format(
+            "",
+            sum(result.seconds for result in results),
+            len(results),
+            len([result for result in results if result.code]),
+        )
+    )
+
+    return "\n".join(rows)
+
+
+def _exit_code(ret):
+    if type(ret) is int:
+        return ret
+
+    if type(ret) is bool:
+        return int(not ret)
+
+    return 0 if ret is None else 1
+
+
+def make_shell(persistent_history=True):
+    return EMTaskShell(
         name="nubia_example",
-        command_pkgs=[
-            emtask.sql.nubia_commands,
-            emtask.ced.nubia_commands,
-            emtask.misc,
-        ],
-        options=Options(persistent_history=True),
+        command_pkgs=COMMAND_PACKAGES,
+        plugin=EMTaskPlugin(),
+        options=Options(persistent_history=persistent_history),
+    )
+
+
+def main(argv=None):
+    argv = sys.argv if argv is None else argv
+    parser = argparse.ArgumentParser(add_help=False)
+    parser.add_argument("--batch", metavar="FILE", help="- reads from stdin")
+    parser.add_argument("--keep-going", action="store_true")
+    parser.add_argument("--parallel", type=int, default=1, metavar="WORKERS")
+    batch_args, _ = parser.parse_known_args(argv[1:])
+
+    if batch_args.batch is None:
+        sys.exit(make_shell().run(argv))
+
+    if batch_args.batch == "-":
+        lines = sys.stdin.readlines()
+    else:
+        with open(batch_args.batch) as f:
+            lines = f.readlines()
+    shell = make_shell(persistent_history=False)
+    results = shell.run_batch(
+        lines, keep_going=batch_args.keep_going, workers=batch_args.parallel
     )
-    sys.exit(shell.run())
+    print(format_timings(results), file=sys.stderr)
+    sys.exit(1 if any(result.code for result in results) else 0)
 
 
 if __name__ == "__main__":
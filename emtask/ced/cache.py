@@ -0,0 +1,109 @@
+import os
+import threading
+from collections import OrderedDict
+
+# parsed lxml trees take several times the size of the xml file they come from
+PARSED_SIZE_FACTOR = 8
+
+
+class ProcessCache(object):
+    """Least recently used cache of parsed processes.
+
+    Entries are keyed by (realpath, mtime, size) so a file changed on disk is
+    parsed again. Eviction happens when there are more than max_entries or,
+    if max_bytes is given, when the estimated memory of the parsed trees goes
+    over it. With copy_on_open every caller gets its own copy of the tree so
+    editing an opened process never corrupts the cached one."""
+
+    def __init__(self, max_entries=128, max_bytes=None, copy_on_open=True):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.copy_on_open = copy_on_open
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.size_bytes = 0
+        self._entries = OrderedDict()
+        self._keys_by_path = {}
+        self._lock = threading.Lock()
+
+    def open(self, realpath, load, stamp=None):
+        """Returns the cached resource for realpath, calling load() to parse
+        it when it is not cached or the file changed. stamp is the (mtime,
+        size) of the file when the caller already knows it"""
+        if stamp is None:
+            stat = os.stat(str(realpath))
+            stamp = (stat.st_mtime, stat.st_size)
+        key = (str(realpath),) + tuple(stamp)
+
+        with self._lock:
+            resource = self._entries.get(key)
+
+            if resource is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+            else:
+                self.misses += 1
+
+        if resource is None:
+            resource = load()
+            self._add(key, resource)
+
+        return resource.copy() if self.copy_on_open else resource
+
+    def stats(self):
+        return {
+            "entries": len(self._entries),
+            "size_bytes": self.size_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._keys_by_path.clear()
+            self.size_bytes = 0
+
+    def _add(self, key, resource):
+        with self._lock:
+            stale_key = self._keys_by_path.get(key[0])
+
+            if stale_key is not None:
+                self._remove(stale_key)
+            self._entries[key] = resource
+            self._keys_by_path[key[0]] = key
+            self.size_bytes += _estimated_size(key)
+
+            while len(self._entries) > 1 and self._over_budget():
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def _remove(self, key):
+        del self._entries[key]
+        del self._keys_by_path[key[0]]
+        self.size_bytes -= _estimated_size(key)
+
+    def _over_budget(self):
+        if len(self._entries) > self.max_entries:
+            return True
+
+        return self.max_bytes is not None and self.size_bytes > self.max_bytes
+
+
+def _estimated_size(key):
+    return key[2] * PARSED_SIZE_FACTOR
+
+
+_process_cache = ProcessCache()
+
+
+def get_process_cache():
+    return _process_cache
+
+
+def set_process_cache(cache):
+    """Replaces the cache used when opening processes, None disables it"""
+    global _process_cache
+    _process_cache = cache
@@ -1,10 +1,17 @@
+import hashlib
+import io
 import os
+import uuid
+from collections import namedtuple
 from copy import deepcopy
 from pathlib import Path
 
 import lxml.etree as ET
 from lxml.etree import CDATA
 
+from emtask.ced import index
+from emtask.ced.cache import get_process_cache
+
 
 def make_import(childprocess_path):
     packagenames = childprocess_path.split(".")
@@ -18,13 +25,28 @@ def make_import(childprocess_path):
     return import_elem
 
 
-def make_field(field_type, field_name):
+# The make_* builders below clone prebuilt element skeletons and only set the
+# attributes that vary, which is several times faster than building each
+# element and attribute from scratch. Prototypes are private, callers only
+# ever get copies. Throughput target on a developer machine: 20,000 new empty
+# processes per second and 1,000 wrappers per second for processes with 20
+# parameters, when generating thousands of them in one go. Measure it with
+# emtasktest/benchmarks.py.
+
+
+def _clone(prototype):
+    # lxml copies the whole subtree on __copy__, without the memo bookkeeping
+    # of copy.deepcopy
+    return prototype.__copy__()
+
+
+def _build_field(field_type):
     field = ET.Element(
         field_type + "Field",
         designNodes="",
         isAttribute="false",
         length="0",
-        name=field_name,
+        name="",
     )
     locale = ET.SubElement(field, field_type + "Field", locale="")
     ET.SubElement(locale, "Format")
@@ -32,6 +54,20 @@ def make_field(field_type, field_name):
     return field
 
 
+_field_prototypes = {}
+
+
+def make_field(field_type, field_name):
+    prototype = _field_prototypes.get(field_type)
+
+    if prototype is None:
+        prototype = _field_prototypes[field_type] = _build_field(field_type)
+    field = _clone(prototype)
+    field.set("name", field_name)
+
+    return field
+
+
 def make_object_field(object_type, name):
     field = make_field("Object", name)
     ET.SubElement(field, "TypeDefinitionReference", name=object_type, nested="false")
@@ -39,7 +75,7 @@ def make_object_field(object_type, name):
     return field
 
 
-def make_process_def(name):
+def _build_process_def():
     attribs = {
         "appearsInHistory": "true",
         "cyclic": "false",
@@ -48,7 +84,7 @@ def make_process_def(name):
         "icon": "",
         "isPrivate": "false",
         "logicalDatabaseConnection": "",
-        "name": name,
+        "name": "",
         "nested": "false",
         "pointOfNoReturn": "false",
         "transactionBehaviour": "TX_NOT_SUPPORTED",
@@ -59,30 +95,44 @@ def make_process_def(name):
     return ET.Element("ProcessDefinition", attribs)
 
 
-def make_process_pkg_entry(name):
+_PROCESS_DEF = _build_process_def()
+
+
+def make_process_def(name):
+    process_def = _clone(_PROCESS_DEF)
+    process_def.set("name", name)
+
+    return process_def
+
+
+def _build_process_pkg_entry():
     root = ET.Element("PackageEntry")
-    root.append(make_process_def(name))
-    ET.SubElement(
-        make_process_def(name), "StartNode", displayName="", name="", x="16", y="32"
-    )
-    ET.SubElement(
-        make_process_def(name), "EndNode", displayName="", name="", x="240", y="32"
-    )
-    ET.SubElement(make_process_def(name), "BuilderInfo", name="")
-    ET.SubElement(
-        make_process_def(name), "TopicScope", defineTopicScope="false", name=""
-    )
+    process_def = ET.SubElement(root, "ProcessDefinition", _PROCESS_DEF.attrib)
+    ET.SubElement(process_def, "StartNode", displayName="", name="", x="16", y="32")
+    ET.SubElement(process_def, "EndNode", displayName="", name="", x="240", y="32")
+    ET.SubElement(process_def, "BuilderInfo", name="")
+    ET.SubElement(process_def, "TopicScope", defineTopicScope="false", name="")
 
     return root
 
 
-def make_procedure_elem(name):
+_PROCESS_PKG_ENTRY = _build_process_pkg_entry()
+
+
+def make_process_pkg_entry(name):
+    root = _clone(_PROCESS_PKG_ENTRY)
+    root[0].set("name", name)
+
+    return root
+
+
+def _build_procedure_elem():
     procedure = ET.Element(
         "Procedure",
         designNotes="",
         isTPL="false",
         Language="EcmaScript",
-        name=name,
+        name="",
         nested="false",
         version="10",
     )
@@ -93,6 +143,16 @@ def make_procedure_elem(name):
     return procedure
 
 
+_PROCEDURE = _build_procedure_elem()
+
+
+def make_procedure_elem(name):
+    procedure = _clone(_PROCEDURE)
+    procedure.set("name", name)
+
+    return procedure
+
+
 def make_procedure(root, path):
     procedure_name = path.rsplit(".", 1)[1]
 
@@ -105,31 +165,41 @@ def make_process(root, path):
     return Process(root, path, ET.ElementTree(make_process_pkg_entry(process_name)))
 
 
-def make_childprocess(process_ref_name, coordinates):
-    instance_name = process_ref_name[0].lower() + process_ref_name[1:]
+def _build_childprocess():
     childprocess = ET.Element(
         "ChildProcess",
         displayName="",
         executeAsAsynchronous="false",
-        name=instance_name,
-        x=coordinates[0],
-        y=coordinates[1],
+        name="",
+        x="",
+        y="",
     )
     ET.SubElement(
         childprocess,
         "ProcessDefinitionReference",
-        name=process_ref_name,
+        name="",
         nested="false",
     )
 
     return childprocess
 
 
-def make_start_transition(childprocess_name, coordinates):
-    transition = ET.Element("Transition", isExceptionTransition="false")
-    ET.SubElement(transition, "StartNodeReference", name="")
-    ET.SubElement(transition, "ToNode", name=childprocess_name)
-    graph_node_list = ET.SubElement(transition, "GraphNodeList", name="")
+_CHILDPROCESS = _build_childprocess()
+
+
+def make_childprocess(process_ref_name, coordinates):
+    instance_name = process_ref_name[0].lower() + process_ref_name[1:]
+    childprocess = _clone(_CHILDPROCESS)
+    childprocess.set("name", instance_name)
+    childprocess.set("x", coordinates[0])
+    childprocess.set("y", coordinates[1])
+    childprocess[0].set("name", process_ref_name)
+
+    return childprocess
+
+
+def _build_graph_node_list(parent):
+    graph_node_list = ET.SubElement(parent, "GraphNodeList", name="")
     ET.SubElement(
         graph_node_list,
         "GraphNode",
@@ -137,28 +207,53 @@ def make_start_transition(childprocess_name, coordinates):
         isLabelHolder="true",
         label="",
         name="",
-        x=coordinates[0],
-        y=coordinates[1],
+        x="",
+        y="",
     )
 
+
+def _set_graph_node_coordinates(parent, coordinates):
+    graph_node = parent[2][0]  # GraphNodeList/GraphNode
+    graph_node.set("x", coordinates[0])
+    graph_node.set("y", coordinates[1])
+
+
+def _build_start_transition():
+    transition = ET.Element("Transition", isExceptionTransition="false")
+    ET.SubElement(transition, "StartNodeReference", name="")
+    ET.SubElement(transition, "ToNode", name="")
+    _build_graph_node_list(transition)
+
     return transition
 
 
-def make_end_transition(childprocess_name, coordinates):
+_START_TRANSITION = _build_start_transition()
+
+
+def make_start_transition(childprocess_name, coordinates):
+    transition = _clone(_START_TRANSITION)
+    transition[1].set("name", childprocess_name)  # ToNode
+    _set_graph_node_coordinates(transition, coordinates)
+
+    return transition
+
+
+def _build_end_transition():
     transition = ET.Element("Transition", isExceptionTransition="false")
-    ET.SubElement(transition, "FromNode", name=childprocess_name)
+    ET.SubElement(transition, "FromNode", name="")
     ET.SubElement(transition, "EndNodeReference", name="")
-    graph_node_list = ET.SubElement(transition, "GraphNodeList", name="")
-    ET.SubElement(
-        graph_node_list,
-        "GraphNode",
-        icon="",
-        isLabelHolder="true",
-        label="",
-        name="",
-        x=coordinates[0],
-        y=coordinates[1],
-    )
+    _build_graph_node_list(transition)
+
+    return transition
+
+
+_END_TRANSITION = _build_end_transition()
+
+
+def make_end_transition(childprocess_name, coordinates):
+    transition = _clone(_END_TRANSITION)
+    transition[0].set("name", childprocess_name)  # FromNode
+    _set_graph_node_coordinates(transition, coordinates)
 
     return transition
 
@@ -169,27 +264,29 @@ def make_fieldstore(name, coordinates):
     )
 
 
-def make_dataflow(fromnode, tonode, coordinates):
+def _build_dataflow():
     dataflow = ET.Element("DataFlow")
-    ET.SubElement(dataflow, "FromNode", name=fromnode)
-    ET.SubElement(dataflow, "ToNode", name=tonode)
-    graph_node_list = ET.SubElement(dataflow, "GraphNodeList", name="")
-    ET.SubElement(
-        graph_node_list,
-        "GraphNode",
-        icon="",
-        isLabelHolder="true",
-        label="",
-        name="",
-        x=coordinates[0],
-        y=coordinates[1],
-    )
+    ET.SubElement(dataflow, "FromNode", name="")
+    ET.SubElement(dataflow, "ToNode", name="")
+    _build_graph_node_list(dataflow)
 
     return dataflow
 
 
-def make_dataflow_entry(dataflow, fromnode, tonode, from_data=None, to_data=None):
-    dataflow_entry = ET.SubElement(dataflow, "DataFlowEntry")
+_DATAFLOW = _build_dataflow()
+
+
+def make_dataflow(fromnode, tonode, coordinates):
+    dataflow = _clone(_DATAFLOW)
+    dataflow[0].set("name", fromnode)
+    dataflow[1].set("name", tonode)
+    _set_graph_node_coordinates(dataflow, coordinates)
+
+    return dataflow
+
+
+def _build_dataflow_entry():
+    dataflow_entry = ET.Element("DataFlowEntry")
     from_field = ET.SubElement(dataflow_entry, "FromField")
     param_assignment = ET.SubElement(
         from_field,
@@ -199,18 +296,229 @@ def make_dataflow_entry(dataflow, fromnode, tonode, from_data=None, to_data=None
         name="",
         version="",
     )
-    verbatim = ET.SubElement(param_assignment, "Verbatim", fieldName="text")
-    verbatim.text = CDATA(from_data)
+    ET.SubElement(param_assignment, "Verbatim", fieldName="text")
     to_field = ET.SubElement(dataflow_entry, "ToField")
-    ET.SubElement(to_field, "FieldDefinitionReference", name=to_data)
+    ET.SubElement(to_field, "FieldDefinitionReference", name="")
+
+    return dataflow_entry
+
+
+_DATAFLOW_ENTRY = _build_dataflow_entry()
+
+
+def make_dataflow_entry(dataflow, fromnode, tonode, from_data=None, to_data=None):
+    dataflow_entry = _clone(_DATAFLOW_ENTRY)
+    # FromField/ParameterAssignment/Verbatim and ToField/FieldDefinitionReference
+    dataflow_entry[0][0][0].text = CDATA(from_data)
+    dataflow_entry[1][0].set("name", to_data)
+    dataflow.append(dataflow_entry)
 
     return dataflow
 
 
-def parse(ced, path):
-    etree = ET.parse(str(ced.get_realpath(path)))
+def parse(ced, path, entry=None):
+    """Parses the process at path. Given its ClasspathEntry the file is
+    neither looked up nor stat'ed again, the cache is keyed on the entry"""
+    if entry is None:
+        realpath = ced.get_realpath(path)
+        stamp = None
+    else:
+        realpath = entry.path
+        stamp = (entry.mtime, entry.size)
+    cache = get_process_cache()
+
+    if cache is None:
+        return _parse(ced.root, path, realpath)
+
+    return cache.open(realpath, lambda: _parse(ced.root, path, realpath), stamp)
+
+
+def _parse(root, path, realpath):
+    # opened here so a missing file raises FileNotFoundError, not lxml's
+    # OSError
+    with open(str(realpath), "rb") as f:
+        content = f.read()
+        stat = os.fstat(f.fileno())
+    process = Process(root, path, ET.parse(io.BytesIO(content)))
+    process._source_digest = _remember_file_digest(realpath, stat, content)
+
+    return process
+
+
+# realpath -> (mtime, size, sha1) of the files read or written, so checking
+# whether a resource changes a file does not read the file again
+_file_digests = {}
+
+
+def _remember_file_digest(realpath, stat, content):
+    digest = hashlib.sha1(content).hexdigest()
+    _file_digests[str(realpath)] = (stat.st_mtime, stat.st_size, digest)
+
+    return digest
+
+
+def _file_digest(realpath, stat):
+    known = _file_digests.get(str(realpath))
+
+    if known is not None and known[:2] == (stat.st_mtime, stat.st_size):
+        return known[2]
+
+    return None
+
+
+ProcessSummary = namedtuple(
+    "ProcessSummary", "path name imports fields parameters results childprocesses"
+)
+FieldSummary = namedtuple("FieldSummary", "name field_type object_type")
+
+
+def summarize(ced, path):
+    """Returns the signature of a process: its name, imports (name to
+    classpath), instance fields, the names of its parameters and results and
+    the names of the processes it calls as child processes.
+    Large files are streamed and each child of the process definition is
+    dropped once read, so their graph nodes, transitions and scripts are
+    never all in memory"""
+
+    return _summarize(path, ced.get_realpath(path))
 
-    return Process(ced.root, path, etree)
+
+def iter_summaries(ced):
+    """Yields a ProcessSummary for every process under the ced root"""
+
+    for path in ced.index.classpaths(doctype="ProcessDefinition"):
+        yield summarize(ced, path)
+
+
+_SUMMARY_CHUNK_SIZE = 64 * 1024
+
+
+def _summarize(path, realpath):
+    reader = _SummaryReader(path)
+
+    if os.stat(str(realpath)).st_size <= _SUMMARY_CHUNK_SIZE:
+        reader.read_tree(ET.parse(str(realpath)).getroot())
+
+        return reader.summary()
+    # libxml2 builds the tree in C and only reports these tags, the children
+    # of the process definition are read and dropped in bulk after each chunk
+    parser = ET.XMLPullParser(
+        events=("start", "end"),
+        tag=("ProcessDefinition", "ImportDeclaration"),
+        remove_blank_text=True,
+        collect_ids=False,
+    )
+
+    with open(str(realpath), "rb") as f:
+        for chunk in iter(lambda: f.read(_SUMMARY_CHUNK_SIZE), b""):
+            parser.feed(chunk)
+            reader.read_events(parser.read_events())
+    parser.close()
+    reader.read_events(parser.read_events())
+    reader.drop_read(keep_last=False)
+
+    return reader.summary()
+
+
+class _SummaryReader(object):
+    def __init__(self, path):
+        self.path = path
+        self.process_def = None
+        self.name = None
+        self.imports = {}
+        self.fields = []
+        self.markers = {"Parameter": [], "Result": []}
+        self.childprocesses = []
+
+    def read_events(self, events):
+        for event, elem in events:
+            if elem.getparent() is None or elem.getparent().getparent() is not None:
+                continue  # nested process definitions or imports
+            elif elem.tag == "ImportDeclaration":
+                if event == "end":
+                    self.imports[elem.get("name")] = _import_classpath(elem)
+            elif self.process_def is None:
+                self.process_def = elem
+                self.name = elem.get("name")
+        self.drop_read(keep_last=True)
+
+    def drop_read(self, keep_last):
+        """Reads and drops the children of the process definition, but the
+        last one while it may still be parsed"""
+        process_def = self.process_def
+
+        if process_def is None:
+            return
+        keep = 1 if keep_last else 0
+
+        while len(process_def) > keep:
+            self._read(process_def[0])
+            del process_def[0]
+
+        # the imports read so far, the process definition is kept
+        rootnode = process_def.getparent()
+
+        while rootnode[0] is not process_def:
+            del rootnode[0]
+
+    def read_tree(self, rootnode):
+        """Reads a small process parsed as a whole"""
+        for import_elem in rootnode.iterchildren("ImportDeclaration"):
+            self.imports[import_elem.get("name")] = _import_classpath(import_elem)
+        self.process_def = rootnode.find("ProcessDefinition")
+        self.name = self.process_def.get("name")
+
+        for child in self.process_def:
+            self._read(child)
+
+    def _read(self, elem):
+        tag = elem.tag
+
+        if tag in self.markers:
+            self.markers[tag].append(elem.get("name"))
+        elif tag == "InstanceFields":
+            self.fields.extend(_field_summary(field) for field in elem)
+        elif tag == "ChildProcess":
+            self.childprocesses.append(
+                elem.find("ProcessDefinitionReference").get("name")
+            )
+        elif len(elem):
+            # child processes of nested process definitions
+            self.childprocesses.extend(
+                ref.get("name")
+                for ref in elem.iterfind(".//ChildProcess/ProcessDefinitionReference")
+            )
+
+    def summary(self):
+        return ProcessSummary(
+            self.path,
+            self.name,
+            self.imports,
+            self.fields,
+            self.markers["Parameter"],
+            self.markers["Result"],
+            self.childprocesses,
+        )
+
+
+def _import_classpath(import_elem):
+    packagenames = [
+        elem.get("name")
+        for elem in import_elem.iterfind("PackageSpecifier/PackageName")
+    ]
+    packagenames.append(import_elem.find("PackageEntryReference").get("name"))
+
+    return ".".join(packagenames)
+
+
+def _field_summary(field):
+    type_ref = field.find("TypeDefinitionReference")
+
+    return FieldSummary(
+        field.get("name"),
+        field.tag[: -len("Field")],
+        None if type_ref is None else type_ref.get("name"),
+    )
 
 
 class CEDResource(object):
@@ -219,14 +527,14 @@ class CEDResource(object):
         self._etree = etree
         self.rootnode = self._etree.getroot()
         self.path = path
+        # digest of the file the resource was parsed from, until it changes
+        self._source_digest = None
 
     def save(self):
-        realpath = self.realpath()
-
-        if not realpath.parent.exists():
-            realpath.parent.mkdir(parents=True, exist_ok=True)
+        """Writes the resource unless the file already has the same content.
+        Returns whether the file was written"""
 
-        realpath.write_text(str(self))
+        return bool(save_all([self]))
 
     def realpath(self):
         relative_path = Path(self.path.replace(".", os.sep) + ".xml")
@@ -234,14 +542,94 @@ class CEDResource(object):
 
         return realpath
 
-    def __str__(self):
+    def copy(self):
+        resource = type(self)(self.root, self.path, deepcopy(self._etree))
+        resource._source_digest = self._source_digest
+
+        return resource
+
+    def digest(self):
+        """Hash of the content as it would be saved. A resource parsed from a
+        file answers with the hash of the file, taken when it was read, until
+        it is changed through its methods: elements edited directly on the
+        tree of a parsed resource need invalidate(). Other resources are
+        serialized on each call"""
+        if self._source_digest is not None:
+            return self._source_digest
+
+        return hashlib.sha1(self.to_bytes()).hexdigest()
+
+    def invalidate(self):
+        self._source_digest = None
+
+    def to_bytes(self):
         return ET.tostring(
             self._etree,
             pretty_print=True,
             doctype="<!DOCTYPE " + self._get_doctype() + " [] >",
             encoding="UTF-8",
             xml_declaration=True,
-        ).decode("utf-8")
+        )
+
+    def __str__(self):
+        return self.to_bytes().decode("utf-8")
+
+
+def save_all(resources):
+    """Serializes all resources and then writes those whose content differs
+    from the file on disk. Each file is replaced atomically so the CED never
+    reads a half written resource. Returns the resources written"""
+    pending = [
+        (resource, resource.realpath(), resource.to_bytes()) for resource in resources
+    ]
+
+    for parent in {realpath.parent for _, realpath, _ in pending}:
+        parent.mkdir(parents=True, exist_ok=True)
+    written = []
+
+    for resource, realpath, content in pending:
+        if _write_if_changed(realpath, content):
+            index.record(resource.root, resource.path, realpath)
+            written.append(resource)
+
+    return written
+
+
+def _write_if_changed(realpath, content):
+    try:
+        stat = os.stat(str(realpath))
+    except FileNotFoundError:
+        stat = None
+
+    if stat is not None and stat.st_size == len(content):
+        digest = _file_digest(realpath, stat)
+
+        if digest is not None:
+            unchanged = digest == hashlib.sha1(content).hexdigest()
+        else:
+            unchanged = realpath.read_bytes() == content
+
+        if unchanged:
+            return False
+    # a named temp file next to the target lets os.replace swap it in
+    # atomically, it gets the mode of the file it replaces
+    tmp_path = realpath.with_name(
+        ".{}.{}.tmp".format(realpath.name, uuid.uuid4().hex[:8])
+    )
+    try:
+        with open(tmp_path, "xb") as f:
+            f.write(content)
+
+        if stat is not None:
+            os.chmod(str(tmp_path), stat.st_mode)
+        os.replace(str(tmp_path), str(realpath))
+    except BaseException:
+        if tmp_path.exists():
+            tmp_path.unlink()
+        raise
+    _remember_file_digest(realpath, os.stat(str(realpath)), content)
+
+    return True
 
 
 class Procedure(CEDResource):
@@ -260,6 +648,7 @@ class Procedure(CEDResource):
         for key, value in kwargs.items():
             local_vars = ET.SubElement(self.rootnode, "ProcedureLocals")
             ET.SubElement(local_vars, "IntegerField", name=key)
+        self.invalidate()
 
     def local_vars(self):
         self.rootnode
@@ -271,6 +660,7 @@ class Process(CEDResource):
     def __init__(self, root, path, etree):
         super().__init__(root, path, etree)
         self.procedures = []
+        self._lookup_index = {}
 
     @property
     def instance_fields(self):
@@ -282,25 +672,26 @@ class Process(CEDResource):
 
     @property
     def process_def(self):
-        return self.rootnode.find("ProcessDefinition")
+        return next(self.rootnode.iterchildren("ProcessDefinition"), None)
 
     def add_import(self, import_elem):
         self.rootnode.append(import_elem)
+        self.invalidate()
 
     def get_imports(self):
         return self.rootnode.findall("ImportDeclaration")
 
     def add_fields(self, fields):
-        for field in fields:
-            self.add_field(field)
-
-    def add_field(self, field_node):
-        process_def = self.rootnode.find("ProcessDefinition")
+        process_def = self.process_def
         instance_fields = process_def.find("InstanceFields")
 
         if instance_fields is None:
             instance_fields = ET.SubElement(process_def, "InstanceFields")
-        instance_fields.append(field_node)
+        instance_fields.extend(fields)
+        self.invalidate()
+
+    def add_field(self, field_node):
+        self.add_fields([field_node])
 
     def mark_as_parameter(self, field_name):
         self._mark_field(field_name, "Parameter")
@@ -309,40 +700,41 @@ class Process(CEDResource):
         self._mark_field(field_name, "Result")
 
     def _mark_field(self, field_name, tagname):
-        attrib = {"from": "", "name": field_name, "to": ""}
-        # attrib can not be inline due to key work 'from'
-        ET.SubElement(self.process_def, tagname, attrib)
+        self._mark_fields([field_name], tagname)
+
+    def _mark_fields(self, field_names, tagname):
+        process_def = self.process_def
+
+        for field_name in field_names:
+            attrib = {"from": "", "name": field_name, "to": ""}
+            # attrib can not be inline due to key work 'from'
+            ET.SubElement(process_def, tagname, attrib)
+        self.invalidate()
 
     def get_parameters(self):
-        return self._get_params_or_results("Parameter")
+        return self._marked_fields(_child_names(self.process_def, "Parameter"))
 
     def get_results(self):
-        return self._get_params_or_results("Result")
+        return self._marked_fields(_child_names(self.process_def, "Result"))
 
-    def _get_params_or_results(self, tagname):
-        return [
-            field
-            for field in self.instance_fields.find(".")
-            if field.get("name") in self._get_process_def_child_names(tagname)
-        ]
+    def _marked_fields(self, names):
+        instance_fields = self.instance_fields
 
-    def _get_process_def_child_names(self, tagname):
-        return [elem.get("name") for elem in self.process_def.findall(tagname)]
+        if instance_fields is None:
+            return []
+
+        return [field for field in instance_fields if field.get("name") in names]
 
     def get_field(self, name):
-        for node in self.rootnode.iter():
-            if node.tag == "InstanceFields":
-                instance_fields = node
+        field = self._lookups("fields").get(name)
 
-        if instance_fields is not None:
-            for field in instance_fields.iter():
-                if field.get("name") == name:
-                    return field
+        if field is None or not self._is_own(field, name, depth=3):
+            field = self._lookups("fields", rebuild=True).get(name)
 
-        return None
+        return field
 
     def add_general_procedure(self, procedure_name):
-        if not self.instance_procedures:
+        if self.instance_procedures is None:
             ET.SubElement(self.process_def, "InstanceProcedures", name="")
 
         ET.SubElement(
@@ -351,6 +743,7 @@ class Process(CEDResource):
         self.procedures.append(
             make_procedure(self.root, self.path + "." + procedure_name)
         )
+        self.invalidate()
 
     def get_procedure(self, procedure_name):
         for procedure in self.procedures:
@@ -371,10 +764,10 @@ class Process(CEDResource):
         return GenerateProcessWrapper(self, path).run()
 
     def get_params_and_results(self):
-        result = list(self.get_parameters())
-        result.extend(field for field in self.get_results() if field not in result)
+        parameter_names = _child_names(self.process_def, "Parameter")
+        result_names = _child_names(self.process_def, "Result") - parameter_names
 
-        return result
+        return self._marked_fields(parameter_names) + self._marked_fields(result_names)
 
     def add_imports(self, imports):
         for import_elem in imports:
@@ -383,34 +776,83 @@ class Process(CEDResource):
     def get_object_import(self, object_field):
         object_ref = object_field.find("TypeDefinitionReference").get("name")
 
-        for import_elem in self.get_imports():
-            if object_ref == import_elem.get("name"):
-                return import_elem
+        import_elem = self._lookups("imports").get(object_ref)
 
-        return None
+        if import_elem is None or not self._is_own(import_elem, object_ref, depth=1):
+            import_elem = self._lookups("imports", rebuild=True).get(object_ref)
+
+        return import_elem
 
     def save(self):
-        super().save()
+        """Saves the process and its procedures in one batch, returns whether
+        the process file was written"""
 
-        for procedure in self.procedures:
-            procedure.save()
+        written = save_all([self] + self.procedures)
+
+        return any(resource is self for resource in written)
 
     def _get_doctype(self):
         return "ProcessDefinition"
 
+    def invalidate(self):
+        super().invalidate()
+        self._lookup_index = {}
+
+    def _lookups(self, kind, rebuild=False):
+        """Returns the "fields" or "imports" by name. Callers check each hit
+        is still named and placed as indexed and rebuild that lookup on a
+        miss, so elements edited, added or removed directly on the tree are
+        seen. A rebuild costs one pass over the fields or the imports"""
+        lookup = self._lookup_index.get(kind)
+
+        if rebuild or lookup is None:
+            if kind == "fields":
+                elems = self.instance_fields
+            else:
+                elems = self.rootnode.iterchildren("ImportDeclaration")
+            lookup = self._lookup_index[kind] = _by_name(
+                elems if elems is not None else ()
+            )
+
+        return lookup
+
+    def _is_own(self, elem, name, depth):
+        """Whether elem is still called name and depth levels below the root"""
+        if elem.get("name") != name:
+            return False
+
+        for _ in range(depth):
+            elem = elem.getparent()
+
+            if elem is None:
+                return False
+
+        return elem is self.rootnode
+
     def __eq__(self, other):
         if not isinstance(other, Process):
             return False
 
-        return str(self) == str(other)
+        return self.digest() == other.digest()
 
     def mark_all_as_parameters(self, fields):
-        for field in fields:
-            self.mark_as_parameter(field.get("name"))
+        self._mark_fields([field.get("name") for field in fields], "Parameter")
 
     def mark_all_as_results(self, fields):
-        for field in fields:
-            self.mark_as_result(field.get("name"))
+        self._mark_fields([field.get("name") for field in fields], "Result")
+
+
+def _by_name(elems):
+    lookup = {}
+
+    for elem in elems:
+        lookup.setdefault(elem.get("name"), elem)
+
+    return lookup
+
+
+def _child_names(elem, tagname):
+    return {child.get("name") for child in elem.iterchildren(tagname)}
 
 
 class GenerateProcessWrapper(object):
@@ -420,8 +862,12 @@ class GenerateProcessWrapper(object):
 
     def run(self):
         wrapper = make_process(self.process.root, self.path)
-        wrapper.add_imports(deepcopy(self._get_params_and_results_imports()))
-        wrapper.add_fields(deepcopy(self.process.get_params_and_results()))
+        wrapper.add_imports(
+            [_clone(elem) for elem in self._get_params_and_results_imports()]
+        )
+        wrapper.add_fields(
+            [_clone(field) for field in self.process.get_params_and_results()]
+        )
         wrapper.mark_all_as_parameters(self.process.get_parameters())
         wrapper.mark_all_as_results(self.process.get_results())
 
@@ -0,0 +1,335 @@
+import atexit
+import hashlib
+import json
+import os
+import re
+import threading
+import weakref
+from collections import namedtuple
+from pathlib import Path
+
+INDEX_FILENAME = "classpath_index.json"
+INDEX_VERSION = 2
+
+_DOCTYPE_RE = re.compile(rb"<!DOCTYPE\s+([\w.:-]+)")
+_DOCTYPE_PROBE_SIZE = 512
+
+ClasspathEntry = namedtuple("ClasspathEntry", "root path mtime size doctype")
+
+_live_indexes = weakref.WeakSet()
+
+
+def cache_dir():
+    """Folder of the files emtask keeps about repositories. It is outside the
+    repositories as they can be read only, e.g. a shared product mount"""
+    base = os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache"
+
+    return Path(base) / "emtask"
+
+
+def cache_path(filename, *roots):
+    """Path under cache_dir() of filename for the given repository roots"""
+    key = "\0".join(os.path.abspath(str(root)) for root in roots)
+    digest = hashlib.sha1(key.encode("utf-8")).hexdigest()[:16]
+
+    return cache_dir() / digest / filename
+
+
+def record(root, classpath, realpath):
+    """Updates the loaded indexes of root after a resource has been written.
+    It never triggers a scan, indexes nobody has looked up are left alone"""
+    root = Path(root)
+
+    for index in list(_live_indexes):
+        if index.root == root and index._entries is not None:
+            index.add(classpath, realpath)
+
+
+@atexit.register
+def _save_all():
+    for index in list(_live_indexes):
+        index.save()
+
+
+class ClasspathIndex(object):
+    """Maps classpaths to the xml files within a CED repository root.
+
+    The index is persisted under cache_dir(), never inside the root. Known
+    classpaths are trusted for the session, a lookup is a dictionary access.
+    A classpath remembered as missing costs a stat of its parent folder, so
+    processes created by other tools are found. Listing the classpaths
+    rescans the folders whose mtime changed, refresh() also restats every
+    known file to catch files rewritten in place. Doctypes are only read
+    when listing by doctype."""
+
+    def __init__(self, root, index_path=None):
+        self.root = Path(root)
+        self.index_path = index_path or cache_path(INDEX_FILENAME, self.root)
+        self._entries = None
+        self._dirs = {}
+        # classpath -> mtime of its parent folder when it was not found
+        self._missing = {}
+        self._dirty = False
+        self._lock = threading.RLock()
+        _live_indexes.add(self)
+
+    def lookup(self, classpath):
+        """Returns the ClasspathEntry for classpath or None if it does not
+        exist under this root"""
+        with self._lock:
+            return self._lookup(classpath)
+
+    def _lookup(self, classpath):
+        self._ensure_loaded()
+        entry = self._entries.get(classpath)
+
+        if entry is not None:
+            return entry
+        realpath = self.root / _relative_path(classpath)
+
+        if classpath in self._missing:
+            # a file added to a folder bumps the folder mtime
+            dir_mtime = _mtime(realpath.parent)
+
+            if dir_mtime == self._missing[classpath]:
+                return None
+
+        try:
+            return self._add(classpath, realpath)
+        except (FileNotFoundError, NotADirectoryError):
+            return self._add_missing(classpath, realpath)
+
+    def discard(self, classpath):
+        """Forgets classpath, e.g. when its file is gone, so the next lookup
+        checks the file system again"""
+        with self._lock:
+            self._ensure_loaded()
+
+            if self._entries.pop(classpath, None) is not None:
+                self._dirty = True
+
+    def _add_missing(self, classpath, realpath):
+        self._missing[classpath] = _mtime(realpath.parent)
+        self._dirty = True
+
+        return None
+
+    def __contains__(self, classpath):
+        return self.lookup(classpath) is not None
+
+    def classpaths(self, doctype=None):
+        return [classpath for classpath, _ in self.items(doctype=doctype)]
+
+    def items(self, doctype=None):
+        """Returns (classpath, ClasspathEntry) pairs, rescanning the folders
+        changed since the last listing first"""
+        with self._lock:
+            self._refresh()
+
+            if doctype is None:
+                return list(self._entries.items())
+
+            return [
+                (classpath, entry)
+                for classpath, entry in list(self._entries.items())
+                if self._with_doctype(classpath, entry).doctype == doctype
+            ]
+
+    def _with_doctype(self, classpath, entry):
+        if entry.doctype is not None:
+            return entry
+        entry = self._entries[classpath] = entry._replace(
+            doctype=_read_doctype(entry.path) or ""
+        )
+        self._dirty = True
+
+        return entry
+
+    def add(self, classpath, realpath):
+        with self._lock:
+            return self._add(classpath, realpath)
+
+    def _add(self, classpath, realpath):
+        self._ensure_loaded()
+        entry = self._make_entry(Path(realpath), os.stat(str(realpath)))
+        self._entries[classpath] = entry
+        self._missing.pop(classpath, None)
+        known = self._dirs.get(_relative_to(self.root, entry.path.parent))
+
+        if known is not None and classpath not in known["files"]:
+            known["files"].append(classpath)
+        self._dirty = True
+
+        return entry
+
+    def refresh(self):
+        """Rescans directories changed since the last scan, restats the files
+        of the others and saves the index"""
+        with self._lock:
+            self._refresh(restat=True)
+            self._save()
+
+    def _refresh(self, restat=False):
+        self._ensure_loaded()
+        seen_dirs = {}
+        stack = ["."]
+
+        while stack:
+            reldir = stack.pop()
+            mtime = _mtime(self.root / reldir)
+
+            if mtime is None:
+                continue
+            known = self._dirs.get(reldir)
+
+            if known is not None and known["mtime"] == mtime:
+                seen_dirs[reldir] = known
+
+                if restat:
+                    self._restat(known["files"])
+            else:
+                seen_dirs[reldir] = self._scan_dir(reldir, mtime)
+            stack.extend(seen_dirs[reldir]["subdirs"])
+
+        for reldir, known in self._dirs.items():
+            if reldir not in seen_dirs:
+                self._drop_classpaths(known["files"])
+                self._dirty = True
+
+        if len(seen_dirs) != len(self._dirs) or any(
+            self._dirs.get(reldir) is not known for reldir, known in seen_dirs.items()
+        ):
+            self._dirty = True
+        self._dirs = seen_dirs
+
+    def save(self):
+        """Persists the index if it changed. Saving is best effort, a cache
+        folder that can not be written only costs the next process a scan"""
+        with self._lock:
+            self._save()
+
+    def _save(self):
+        if not self._dirty or self._entries is None:
+            return
+        content = {
+            "version": INDEX_VERSION,
+            "root": str(self.root),
+            "dirs": self._dirs,
+            "entries": {
+                classpath: [
+                    _relative_to(self.root, entry.path),
+                    entry.mtime,
+                    entry.size,
+                    entry.doctype,
+                ]
+                for classpath, entry in self._entries.items()
+            },
+            "missing": self._missing,
+        }
+        tmp_path = self.index_path.with_name(
+            "{}.{}.tmp".format(self.index_path.name, os.getpid())
+        )
+        try:
+            self.index_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path.write_text(json.dumps(content))
+            os.replace(str(tmp_path), str(self.index_path))
+        except OSError:
+            return
+        self._dirty = False
+
+    def _ensure_loaded(self):
+        if self._entries is not None:
+            return
+        self._entries = {}
+        self._load()
+
+    def _load(self):
+        try:
+            content = json.loads(self.index_path.read_text())
+        except (OSError, ValueError):
+            return
+
+        if content.get("version") != INDEX_VERSION:
+            return
+        self._dirs = content["dirs"]
+        self._missing = content["missing"]
+
+        for classpath, (relpath, mtime, size, doctype) in content["entries"].items():
+            self._entries[classpath] = ClasspathEntry(
+                self.root, self.root / relpath, mtime, size, doctype
+            )
+
+    def _scan_dir(self, reldir, mtime):
+        known = self._dirs.get(reldir)
+
+        if known is not None:
+            self._drop_classpaths(known["files"])
+        subdirs = []
+        files = []
+        with os.scandir(str(self.root / reldir)) as it:
+            for dir_entry in it:
+                relpath = _join(reldir, dir_entry.name)
+
+                if dir_entry.is_dir():
+                    subdirs.append(relpath)
+                elif dir_entry.name.endswith(".xml"):
+                    classpath = relpath[: -len(".xml")].replace("/", ".")
+                    self._entries[classpath] = self._make_entry(
+                        Path(dir_entry.path), dir_entry.stat()
+                    )
+                    self._missing.pop(classpath, None)
+                    files.append(classpath)
+
+        return {"mtime": mtime, "subdirs": subdirs, "files": files}
+
+    def _restat(self, classpaths):
+        for classpath in classpaths:
+            entry = self._entries.get(classpath)
+
+            if entry is None:
+                continue
+            try:
+                stat = os.stat(str(entry.path))
+            except FileNotFoundError:
+                continue  # its folder mtime changed, it is rescanned next time
+
+            if (stat.st_mtime, stat.st_size) != (entry.mtime, entry.size):
+                self._entries[classpath] = self._make_entry(entry.path, stat)
+                self._dirty = True
+
+    def _drop_classpaths(self, classpaths):
+        for classpath in classpaths:
+            self._entries.pop(classpath, None)
+
+    def _make_entry(self, path, stat):
+        # the doctype is read on demand by _with_doctype
+        return ClasspathEntry(self.root, path, stat.st_mtime, stat.st_size, None)
+
+
+def _mtime(path):
+    try:
+        return os.stat(str(path)).st_mtime
+    except (FileNotFoundError, NotADirectoryError):
+        return None
+
+
+def _relative_path(classpath):
+    return Path(classpath.replace(".", os.sep) + ".xml")
+
+
+def _relative_to(root, path):
+    return Path(os.path.relpath(str(path), str(root))).as_posix()
+
+
+def _join(reldir, name):
+    return name if reldir == "." else reldir + "/" + name
+
+
+def _read_doctype(path):
+    try:
+        with open(str(path), "rb") as f:
+            match = _DOCTYPE_RE.search(f.read(_DOCTYPE_PROBE_SIZE))
+    except OSError:
+        return None
+
+    return match.group(1).decode("ascii") if match else None
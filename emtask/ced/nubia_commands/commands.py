@@ -1,8 +1,11 @@
+import os
+import time
+
 from nubia import argument, command, context
 from termcolor import cprint
 
-import emtask.ced.tasks as ced_task
-from emtask.ced.tool import MultiRootCED
+# commands import their implementation when invoked, loading them at startup
+# must not pull in lxml, sqltask or the database drivers
 
 
 @command
@@ -15,6 +18,8 @@ def rewire_verb(current_path: str, new_path: str = None):
     """
     It changes the verb repository path on db and the relevant CED process
     """
+    import emtask.ced.tasks as ced_task
+
     # ctx = context.get_context()
     # cprint("Verbose? {}".format(ctx.args.verbose), "yellow")
     ced_task.rewire_verb(current_path=current_path, new_path=new_path)
@@ -22,6 +27,82 @@ def rewire_verb(current_path: str, new_path: str = None):
     return 0  # optional, by default it's 0
 
 
+@command
+@argument(
+    "list_file",
+    description="File with a current path and its new path per line",
+)
+@argument("output", description="Script path, by default under the project work")
+def rewire_verbs(list_file: str, output: str = None):
+    """
+    It writes a single sql script rewiring the verbs of many processes
+    """
+    import emtask.ced.tasks as ced_task
+
+    with open(list_file) as f:
+        rewires = [tuple(line.split()) for line in f if line.strip()]
+    try:
+        report = ced_task.rewire_verbs(rewires, script_path=output)
+    except ValueError as e:
+        cprint(str(e), "red")
+
+        return 1
+
+    for stage, seconds in report.timings:
+        cprint("{:8.3f}s {}".format(seconds, stage), "green")
+
+    for current_path in report.missing:
+        cprint("No verbs found for {}".format(current_path), "red")
+
+    cprint(
+        "Rewired {} verbs into {}".format(report.rewired, report.script_path),
+        "yellow",
+    )
+
+    return 1 if report.missing else 0
+
+
+@command
+@argument(
+    "list_file",
+    description="File with a current path and its new path per line",
+)
+@argument("output", description="Script path, by default under the project work")
+@argument("workers", description="Number of processes rewired concurrently")
+def rewire_processes(list_file: str, output: str = None, workers: int = 4):
+    """
+    It rewires the verbs of many processes and generates their new processes
+    """
+    import emtask.ced.tasks as ced_task
+
+    with open(list_file) as f:
+        rewires = (tuple(line.split()) for line in f if line.strip())
+        pipeline = ced_task.RewirePipeline(_get_ced(), workers=workers)
+        start = time.perf_counter()
+        script_path, results = pipeline.run(rewires, script_path=output)
+    elapsed = time.perf_counter() - start
+
+    for result in results:
+        if result.error:
+            cprint(
+                "{:8.3f}s FAILED {}: {}".format(
+                    result.seconds, result.current_path, result.error
+                ),
+                "red",
+            )
+        else:
+            cprint("{:8.3f}s {}".format(result.seconds, result.new_path), "green")
+    failed = len([result for result in results if result.error])
+    cprint(
+        "Rewired {} of {} processes in {:.3f}s into {}".format(
+            len(results) - failed, len(results), elapsed, script_path
+        ),
+        "yellow",
+    )
+
+    return 1 if failed else 0
+
+
 @command
 @argument(
     "process_to_wrap",
@@ -32,8 +113,120 @@ def wrap_process(process_to_wrap: str, wrapper_path: str = None):
     """
     It changes the verb repository path on db and the relevant CED process
     """
-    ced = MultiRootCED(
-        "/mnt/c/em/projects/fp8_hfr2/repository/default",
-        "/mnt/c/em/products/agent-desktop_15.3-FP8-HFR2_5.8.2/repository/default",
+    _get_ced().open(process_to_wrap).wrapper(wrapper_path).save()
+
+
+@command
+@argument(
+    "pattern",
+    description="Wraps every process matching, e.g. CoreEntities.Implementation.*.Verbs.*",
+)
+@argument("list_file", description="File with one process path per line")
+@argument("wrapper_suffix", description="Appended to each process name")
+@argument("workers", description="Number of processes wrapped concurrently")
+def wrap_processes(
+    pattern: str = None,
+    list_file: str = None,
+    wrapper_suffix: str = "Wrapper",
+    workers: int = 4,
+):
+    """
+    It generates wrappers for many processes at once
+    """
+    import emtask.ced.tasks as ced_task
+
+    ced = _get_ced()
+    process_paths = ced.find(pattern) if pattern else []
+
+    if list_file:
+        with open(list_file) as f:
+            process_paths.extend(line.strip() for line in f if line.strip())
+
+    start = time.perf_counter()
+    results = ced_task.wrap_processes(
+        ced, process_paths, wrapper_suffix=wrapper_suffix, workers=workers
+    )
+    elapsed = time.perf_counter() - start
+
+    for result in results:
+        if result.error:
+            cprint(
+                "{:8.3f}s FAILED {}: {}".format(
+                    result.seconds, result.process_path, result.error
+                ),
+                "red",
+            )
+        else:
+            cprint("{:8.3f}s {}".format(result.seconds, result.wrapper_path), "green")
+    failed = len([result for result in results if result.error])
+    cprint(
+        "Wrapped {} of {} processes in {:.3f}s".format(
+            len(results) - failed, len(results), elapsed
+        ),
+        "yellow",
     )
-    ced.open(process_to_wrap).wrapper(wrapper_path).save()
+
+    return 1 if failed else 0
+
+
+@command
+@argument(
+    "process_path",
+    description="e.g. CoreEntities.Implementation.Customer.Verbs.InlineSearch",
+)
+@argument("refresh", description="Rescan the repositories before answering")
+def references(process_path: str, refresh: bool = False):
+    """
+    It lists the processes calling or importing a process
+    """
+    reference_index = _get_references()
+
+    if refresh:
+        reference_index.refresh()
+    cprint("Callers of {}:".format(process_path), "yellow")
+
+    for caller in reference_index.callers(process_path):
+        print("  " + caller)
+    cprint("Imports of {}:".format(process_path), "yellow")
+
+    for importer in reference_index.importers(process_path):
+        print("  " + importer)
+
+    return 0
+
+
+_ced = None
+
+
+def _get_ced():
+    """The CED of the current project and its product. It is kept for the
+    session so its indexes stay loaded, until the project changes"""
+    global _ced
+    from emtask import project
+    from emtask.project import EMProject
+
+    emproject = project.get_emproject() or EMProject(os.getcwd())
+    roots = (emproject.get_repo(), emproject.get_product_repo())
+
+    if _ced is None or _ced[0] != roots:
+        from emtask.ced.tool import MultiRootCED
+
+        _ced = (roots, MultiRootCED(*roots))
+
+    return _ced[1]
+
+
+_references = None
+
+
+def _get_references():
+    """The ReferenceIndex of _get_ced(), kept for the session as well"""
+    global _references
+    ced = _get_ced()
+
+    if _references is None or _references.ced is not ced:
+        from emtask.ced.references import ReferenceIndex
+
+        _references = ReferenceIndex(ced)
+
+    return _references
@@ -0,0 +1,142 @@
+import json
+import os
+import time
+from collections import defaultdict
+
+from emtask.ced import cedobject_factory
+from emtask.ced.index import cache_path
+
+REFERENCES_FILENAME = "references.json"
+REFERENCES_VERSION = 2
+# seconds the references are answered from the index before rescanning
+REFRESH_TTL = 10 * 60
+
+
+class ReferenceIndex(object):
+    """Reverse references between the processes of a MultiRootCED: who calls
+    a process as a child process and who imports it.
+
+    The references of each process file are stored under the emtask cache
+    folder and only extracted again for files whose mtime or size changed.
+    Rescanning the roots stats every process file, so it is only done by
+    refresh() or when the last scan is older than ttl seconds, queries in
+    between are answered from memory. When a process is in both roots the
+    project one is used, as the CED does."""
+
+    def __init__(self, ced, index_path=None, ttl=REFRESH_TTL):
+        self.ced = ced
+        self.index_path = index_path or cache_path(
+            REFERENCES_FILENAME, ced.project_ced.root, ced.product_ced.root
+        )
+        self.ttl = ttl
+        self._files = None
+        self._refreshed_at = None
+        self._callers = None
+        self._importers = None
+
+    def callers(self, classpath):
+        """Processes that have classpath as a child process"""
+        self._ensure_loaded()
+
+        return sorted(self._callers.get(classpath, ()))
+
+    def importers(self, classpath):
+        """Processes with an ImportDeclaration of classpath"""
+        self._ensure_loaded()
+
+        return sorted(self._importers.get(classpath, ()))
+
+    def refresh(self):
+        """Extracts the references of new or changed processes and saves"""
+        files = self._files if self._files is not None else self._load()
+        refreshed = {}
+
+        for root_name, tool in self._roots():
+            known = files.get(root_name, {})
+            current = refreshed[root_name] = {}
+
+            for classpath, entry in tool.index.items(doctype="ProcessDefinition"):
+                # the classpath index only rescans folders whose mtime
+                # changed, files rewritten in place are only seen by a stat
+                try:
+                    stat = os.stat(str(entry.path))
+                except FileNotFoundError:
+                    continue
+                stamp = [stat.st_mtime, stat.st_size]
+                record = known.get(classpath)
+
+                if record is None or record[:2] != stamp:
+                    record = stamp + self._extract(tool, classpath)
+                current[classpath] = record
+        self._files = refreshed
+        self._refreshed_at = time.time()
+        self._build_reverse_maps()
+        self._save()
+
+    def _roots(self):
+        return [("project", self.ced.project_ced), ("product", self.ced.product_ced)]
+
+    def _extract(self, tool, classpath):
+        summary = cedobject_factory.summarize(tool, classpath)
+        package = classpath.rsplit(".", 1)[0]
+        calls = [
+            summary.imports.get(name, package + "." + name)
+            for name in summary.childprocesses
+        ]
+
+        return [sorted(set(calls)), sorted(set(summary.imports.values()))]
+
+    def _build_reverse_maps(self):
+        self._callers = defaultdict(set)
+        self._importers = defaultdict(set)
+        project_files = self._files.get("project", {})
+
+        for root_name, records in self._files.items():
+            for caller, (_, _, calls, imports) in records.items():
+                if root_name == "product" and caller in project_files:
+                    continue  # overridden by the project
+
+                for callee in calls:
+                    self._callers[callee].add(caller)
+
+                for imported in imports:
+                    self._importers[imported].add(caller)
+
+    def _ensure_loaded(self):
+        if self._files is None:
+            self._files = self._load()
+            self._build_reverse_maps()
+
+        if self._refreshed_at is None or time.time() - self._refreshed_at >= self.ttl:
+            self.refresh()
+
+    def _load(self):
+        try:
+            content = json.loads(self.index_path.read_text())
+        except (OSError, ValueError):
+            return {}
+
+        if content.get("version") != REFERENCES_VERSION:
+            return {}
+        self._refreshed_at = content["refreshed_at"]
+
+        return content["files"]
+
+    def _save(self):
+        tmp_path = self.index_path.with_name(
+            "{}.{}.tmp".format(self.index_path.name, os.getpid())
+        )
+        try:
+            self.index_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path.write_text(
+                json.dumps(
+                    {
+                        "version": REFERENCES_VERSION,
+                        "refreshed_at": self._refreshed_at,
+                        "files": self._files,
+                    }
+                )
+            )
+            os.replace(str(tmp_path), str(self.index_path))
+        except OSError:
+            pass  # best effort, the references are extracted again next time
@@ -1,4 +1,11 @@
-from emtask.sql.tasks import RewireVerbSQLTask, VerbDB
+import time
+from collections import deque, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from emtask import project
+from emtask.sql.snapshot import get_verb_snapshot
+from emtask.sql.tasks import RewireVerbSQLTask, RewireVerbsSQLTask, VerbDB
 
 
 def rewire_verb(current_path=None, new_path=None):
@@ -22,9 +29,203 @@ class RewireVerbTask(object):
         return "TODO implement"
 
 
+RewireReport = namedtuple("RewireReport", "script_path rewired missing timings")
+
+
+def rewire_verbs(rewires, script_path=None):
+    """Writes a single script rewiring the verbs of every (current path, new
+    path) pair in rewires. Raises ValueError when a pair has no new path"""
+
+    return RewireVerbsTask().run(rewires, script_path=script_path)
+
+
+class RewireVerbsTask(object):
+    """Rewires the verbs of many processes: the verbs of every current path
+    are fetched in one batch and rendered into one script. The time taken by
+    each stage is reported as (stage, seconds) pairs"""
+
+    def __init__(self):
+        self.sqltask = RewireVerbsSQLTask()
+
+    def run(self, rewires, script_path=None):
+        timings = []
+        rewires = list(rewires)
+        without_new_path = [rewire[0] for rewire in rewires if len(rewire) < 2]
+
+        if without_new_path:
+            raise ValueError("No new path given for " + ", ".join(without_new_path))
+        new_paths = {rewire[0]: rewire[1] for rewire in rewires}
+
+        start = time.perf_counter()
+        verbs_by_path = VerbDB().fetch_many(list(new_paths))
+        timings.append(("fetch verbs", time.perf_counter() - start))
+
+        start = time.perf_counter()
+        verb_rewires = [
+            (verb, new_paths[current_path])
+            for current_path, verbs in verbs_by_path.items()
+            for verb in verbs
+        ]
+        script = self.sqltask.render(verb_rewires)
+        timings.append(("render", time.perf_counter() - start))
+
+        start = time.perf_counter()
+        script_path = self.sqltask.write(script, script_path or _default_script_path())
+        timings.append(("write", time.perf_counter() - start))
+        missing = [path for path, verbs in verbs_by_path.items() if not verbs]
+
+        return RewireReport(script_path, len(verb_rewires), missing, timings)
+
+
+RewireResult = namedtuple(
+    "RewireResult", "current_path new_path verbs sql seconds error"
+)
+
+
+class RewirePipeline(object):
+    """Rewires verbs and generates the process of their new path, one
+    (current path, new path) pair per item: the verbs are fetched from db,
+    the current process is read and wrapped into the new one, which is saved
+    in the project, and the rewiring sql is rendered.
+
+    Items run on a thread pool so db round trips and xml reads and writes of
+    different items overlap. No more than max_in_flight items are queued at
+    once, so memory stays flat however long the input is. A failing item is
+    reported in its result and does not stop the others. The sql registers
+    the process descriptor of each new process before rewiring its verbs"""
+
+    def __init__(self, ced, workers=4, max_in_flight=None):
+        self.ced = ced
+        self.workers = workers
+        self.max_in_flight = max_in_flight or 2 * workers
+        self.sqltask = RewireVerbsSQLTask()
+
+    def run(self, rewires, script_path=None):
+        """Writes the sql of every item into one script, in input order.
+        Returns the script path and the results"""
+        script_path = Path(script_path or _default_script_path())
+        script_path.parent.mkdir(parents=True, exist_ok=True)
+        results = []
+
+        with script_path.open("w") as script:
+            for result in self.iter_results(rewires):
+                if result.sql:
+                    script.write(result.sql + "\n")
+                results.append(result._replace(sql=None))
+        get_verb_snapshot().invalidate()
+
+        return script_path, results
+
+    def iter_results(self, rewires):
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            yield from _bounded_map(
+                executor, lambda pair: self.rewire(*pair), rewires, self.max_in_flight
+            )
+
+    def rewire(self, current_path, new_path=None):
+        start = time.perf_counter()
+        verbs = []
+        sql = None
+        try:
+            if not new_path:
+                raise ValueError("No new path given for " + current_path)
+            verbs = VerbDB().fetch(repository_path=current_path)
+
+            if not verbs:
+                raise LookupError("No verbs found for " + current_path)
+            process = self.ced.open(current_path)
+
+            if process is None:
+                raise FileNotFoundError("Process not found: " + current_path)
+            new_process = process.wrapper(new_path)
+            new_process.root = self.ced.root
+            new_process.save()
+            sql = self.sqltask.render([(verb, new_path) for verb in verbs])
+            error = None
+        except Exception as e:
+            error = e
+
+        return RewireResult(
+            current_path, new_path, verbs, sql, time.perf_counter() - start, error
+        )
+
+
+def _bounded_map(executor, fn, items, max_in_flight):
+    """Like executor.map but lazy: items are submitted as results are
+    consumed, keeping at most max_in_flight of them pending"""
+    pending = deque()
+
+    for item in items:
+        if len(pending) >= max_in_flight:
+            yield pending.popleft().result()
+        pending.append(executor.submit(fn, item))
+
+    while pending:
+        yield pending.popleft().result()
+
+
+def _default_script_path():
+    return (
+        project.get_emproject().root
+        / "work/emtask/sql"
+        / time.strftime("rewire_verbs_%Y%m%d_%H%M%S.sql")
+    )
+
+
 class GenerateProcessWrapper(object):
     """docstring for ClassName"""
 
     def __init__(self, arg):
         super(ClassName, self).__init__()
         self.arg = arg
+
+
+WrapResult = namedtuple("WrapResult", "process_path wrapper_path seconds error")
+
+
+def wrap_processes(ced, process_paths, wrapper_suffix="Wrapper", workers=4):
+    """Wraps every process in process_paths, the wrapper is saved next to
+    the process with wrapper_suffix appended to its name"""
+
+    return WrapProcessesTask(ced, workers=workers).run(
+        [(path, path + wrapper_suffix) for path in process_paths]
+    )
+
+
+class WrapProcessesTask(object):
+    """Generates and saves process wrappers on a thread pool. lxml releases
+    the GIL while parsing and serializing, so most of the work overlaps"""
+
+    def __init__(self, ced, workers=4):
+        self.ced = ced
+        self.workers = workers
+
+    def run(self, path_pairs):
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            return list(
+                _bounded_map(
+                    executor,
+                    lambda pair: self.wrap(*pair),
+                    path_pairs,
+                    2 * self.workers,
+                )
+            )
+
+    def wrap(self, process_path, wrapper_path):
+        start = time.perf_counter()
+        try:
+            process = self.ced.open(process_path)
+
+            if process is None:
+                raise FileNotFoundError("Process not found: " + process_path)
+            wrapper = process.wrapper(wrapper_path)
+            # wrappers of product processes belong to the project
+            wrapper.root = self.ced.root
+            wrapper.save()
+            error = None
+        except Exception as e:
+            error = e
+
+        return WrapResult(
+            process_path, wrapper_path, time.perf_counter() - start, error
+        )
@@ -4,6 +4,15 @@ from emtask.ced.tool import CED, MultiRootCED
 from emtasktest.testutils import sample_product, sample_project
 
 
+@pytest.fixture(autouse=True)
+def cache_home(tmp_path_factory, monkeypatch):
+    """Keeps the indexes of the sample repositories out of the user cache"""
+    cache_home = tmp_path_factory.mktemp("cache")
+    monkeypatch.setenv("XDG_CACHE_HOME", str(cache_home))
+
+    return cache_home
+
+
 @pytest.fixture
 def ced():
     ced = MultiRootCED(sample_project().get_repo(), sample_project().get_product_repo())
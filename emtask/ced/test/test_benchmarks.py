@@ -0,0 +1,34 @@
+import sys
+
+from emtasktest import benchmarks
+
+
+def test_benchmarks_run_on_small_repository(tmp_path):
+    report = benchmarks.run([20], operations=5, workdir=str(tmp_path))
+
+    results = report["runs"][0]["results"]
+    assert "GenerateProcessWrapper.run" in [result["name"] for result in results]
+    assert all(result["operations"] > 0 for result in results)
+    assert [] == list(tmp_path.iterdir())
+
+
+def test_compare_reports_ratio_per_benchmark():
+    old = {"runs": [{"size": 1, "results": [{"name": "a", "ops_per_sec": 10.0}]}]}
+    new = {"runs": [{"size": 1, "results": [{"name": "a", "ops_per_sec": 20.0}]}]}
+
+    assert [(1, "a", 10.0, 20.0, 2.0)] == benchmarks.compare(old, new)
+
+
+def test_db_benchmarks_run_on_seeded_sqlite_database(tmp_path):
+    report = benchmarks.run([], operations=20, workdir=str(tmp_path), db_verbs=[500])
+
+    results = report["runs"][0]["results"]
+    assert "verbs" == report["runs"][0]["kind"]
+    assert "VerbDB.fetch (snapshot)" in [result["name"] for result in results]
+    assert all(result["operations"] > 0 for result in results)
+
+
+def test_max_rss_is_none_without_resource_module(monkeypatch):
+    monkeypatch.setitem(sys.modules, "resource", None)
+
+    assert benchmarks._max_rss_kb() is None
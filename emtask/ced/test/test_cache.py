@@ -0,0 +1,54 @@
+import pytest
+
+from emtask.ced import cache
+from emtask.ced import cedobject_factory as of
+from emtask.ced.cache import ProcessCache
+
+
+@pytest.fixture
+def process_cache():
+    process_cache = ProcessCache(max_entries=2)
+    cache.set_process_cache(process_cache)
+    yield process_cache
+    cache.set_process_cache(ProcessCache())
+
+
+def test_opening_twice_parses_once(ced, process_cache):
+    ced.new_process("Test.MainProcess").save()
+
+    ced.open("Test.MainProcess")
+    ced.open("Test.MainProcess")
+
+    assert 1 == process_cache.misses
+    assert 1 == process_cache.hits
+
+
+def test_editing_opened_process_does_not_change_cached_one(ced, process_cache):
+    process = ced.new_process("Test.MainProcess")
+    process.add_field(of.make_field("String", "name"))
+    process.save()
+
+    ced.open("Test.MainProcess").add_field(of.make_field("String", "surname"))
+
+    assert ced.open("Test.MainProcess").get_field("surname") is None
+
+
+def test_saving_process_invalidates_cached_one(ced, process_cache):
+    ced.new_process("Test.MainProcess").save()
+    process = ced.open("Test.MainProcess")
+    process.add_field(of.make_field("String", "name"))
+    process.save()
+
+    assert ced.open("Test.MainProcess").get_field("name") is not None
+    assert 1 == process_cache.stats()["entries"]
+
+
+def test_least_recently_used_process_is_evicted(ced, process_cache):
+    for name in ["First", "Second", "Third"]:
+        ced.new_process("Test." + name).save()
+        ced.open("Test." + name)
+
+    ced.open("Test.First")
+
+    assert 2 == process_cache.evictions
+    assert 4 == process_cache.misses
@@ -222,3 +222,122 @@ def test_add_procedure2(ced):
     #    returns="Integer",
     #    contents="var i=0",
     # )
+
+
+def test_get_field_when_process_has_no_fields(ced):
+    process = ced.new_process("Test.TestProcessNoFields")
+
+    assert process.get_field("street") is None
+    assert [] == process.get_params_and_results()
+
+
+def test_lookups_see_fields_appended_directly_to_the_tree(ced):
+    process = ced.new_process("Test.TestProcessLookups")
+    process.add_field(of.make_field("String", "street"))
+    assert process.get_field("number") is None
+
+    process.instance_fields.append(of.make_field("Integer", "number"))
+    process.process_def.append(ET.Element("Result", name="number"))
+
+    assert process.get_field("number") is not None
+    assert ["number"] == [field.get("name") for field in process.get_results()]
+
+
+def test_lookups_see_fields_renamed_or_removed_in_place(ced):
+    process = ced.new_process("Test.TestProcessRename")
+    process.add_fields([of.make_field("String", "name"), of.make_field("Integer", "n")])
+    process.mark_as_parameter("name")
+    assert process.get_field("name") is not None
+
+    process.get_field("name").set("name", "renamed")
+    process.instance_fields.remove(process.get_field("n"))
+
+    assert process.get_field("name") is None
+    assert "renamed" == process.get_field("renamed").get("name")
+    assert process.get_field("n") is None
+    assert [] == process.get_parameters()
+
+
+def test_import_misses_only_rebuild_the_import_lookup(ced):
+    process = ced.new_process("Test.TestProcessBuiltins")
+    process.add_import(of.make_import("Test.Processes.Child"))
+
+    for i in range(10):
+        process.add_field(of.make_object_field("IContext", "context{}".format(i)))
+        process.mark_as_parameter("context{}".format(i))
+    assert process.get_field("context0") is not None
+    fields_lookup = process._lookups("fields")
+
+    process.wrapper("Test.TestProcessBuiltinsWrapper")
+
+    assert fields_lookup is process._lookups("fields")
+
+
+def test_summarize_process_signature(ced):
+    process = ced.new_process("PRJContact.Implementation.Contact.Verbs.ViewContact")
+    process.add_import(of.make_import("PRJContact.Processes.InlineView"))
+    process.add_field(of.make_object_field("InlineView", "inlineView"))
+    process.add_field(of.make_field("Integer", "output"))
+    process.mark_as_parameter("inlineView")
+    process.mark_as_result("output")
+    process.save()
+
+    summary = of.summarize(ced, process.path)
+
+    assert "ViewContact" == summary.name
+    assert {"InlineView": "PRJContact.Processes.InlineView"} == summary.imports
+    assert [
+        ("inlineView", "Object", "InlineView"),
+        ("output", "Integer", None),
+    ] == summary.fields
+    assert ["inlineView"] == summary.parameters
+    assert ["output"] == summary.results
+
+
+def test_summarize_streams_large_processes(ced, monkeypatch):
+    process = ced.new_process("PRJContact.Implementation.Contact.Verbs.Large")
+    process.add_field(of.make_field("Integer", "output"))
+    process.mark_as_result("output")
+
+    for i in range(50):
+        childprocess = of.make_childprocess("Child{}".format(i), ("0", "0"))
+        process.process_def.append(childprocess)
+        process.process_def.append(of.make_start_transition("child", ("0", "0")))
+    process.add_import(of.make_import("PRJContact.Processes.Child0"))
+    process.save()
+    whole = of.summarize(ced, process.path)
+
+    monkeypatch.setattr(of, "_SUMMARY_CHUNK_SIZE", 256)
+    streamed = of.summarize(ced, process.path)
+
+    assert whole == streamed
+    assert ["Child{}".format(i) for i in range(50)] == streamed.childprocesses
+    assert {"Child0": "PRJContact.Processes.Child0"} == streamed.imports
+    assert ["output"] == streamed.results
+
+
+def test_iter_summaries_yields_every_process(product_ced):
+    product_ced.new_process("Core.Verbs.Create").save()
+    product_ced.new_process("Core.Verbs.Delete").save()
+
+    names = sorted(summary.name for summary in of.iter_summaries(product_ced))
+
+    assert ["Create", "Delete"] == names
+
+
+def test_new_process_has_start_and_end_nodes(ced):
+    process = ced.new_process("Test.TestProcessSkeleton")
+
+    assert "TestProcessSkeleton" == process.name()
+    assert process.process_def.find("StartNode") is not None
+    assert process.process_def.find("EndNode") is not None
+
+
+def test_builders_return_independent_elements():
+    first = of.make_field("String", "first")
+    second = of.make_field("String", "second")
+    first.find("StringField").set("locale", "en")
+
+    assert "first" == first.get("name")
+    assert "second" == second.get("name")
+    assert "" == second.find("StringField").get("locale")
@@ -0,0 +1,90 @@
+import os
+
+from emtask.ced.index import ClasspathIndex
+
+
+def test_index_finds_saved_process_and_its_doctype(ced):
+    process_path = "PRJContact.Implementation.Contact.Verbs.ViewContact"
+    ced.new_process(process_path).save()
+
+    entry = ced.project_ced.index.lookup(process_path)
+
+    assert entry.path == ced.get_realpath(process_path)
+    assert entry.doctype is None  # only read when listing by doctype
+    assert [process_path] == ced.project_ced.index.classpaths(
+        doctype="ProcessDefinition"
+    )
+    assert [] == ced.project_ced.index.classpaths(doctype="Procedure")
+
+
+def test_index_remembers_missing_classpaths_across_loads(ced):
+    process_path = "PRJContact.Implementation.Contact.Verbs.Missing"
+    assert ced.open(process_path) is None
+    ced.project_ced.index.save()
+
+    reloaded = ClasspathIndex(ced.root)
+    reloaded.refresh()
+
+    assert process_path in reloaded._missing
+
+
+def test_refresh_picks_up_processes_written_by_other_tools(ced, product_ced):
+    process_path = "CoreContact.Implementation.Contact.Verbs.InlineView"
+    assert not product_ced.exists(process_path)
+
+    other_ced_session = ClasspathIndex(product_ced.root)
+    product_ced.new_process(process_path).save()
+    other_ced_session.refresh()
+
+    assert process_path in other_ced_session.classpaths()
+    assert ced.open(process_path) is not None
+
+
+def test_index_is_not_written_inside_the_repository(ced, cache_home):
+    ced.open("PRJContact.Implementation.Contact.Verbs.Missing")
+    ced.project_ced.index.save()
+
+    assert not (ced.root / ".emtask").exists()
+    assert ced.project_ced.index.index_path.exists()
+    assert cache_home in ced.project_ced.index.index_path.parents
+
+
+def test_lookup_sees_processes_created_after_a_miss(ced, product_ced):
+    process_path = "CoreContact.Implementation.Contact.Verbs.Created"
+    assert ced.open(process_path) is None
+
+    product_ced.new_process(process_path).save()
+
+    assert ced.open(process_path) is not None
+
+
+def test_lookup_forgets_processes_deleted_by_other_tools(ced):
+    process_path = "PRJContact.Implementation.Contact.Verbs.Deleted"
+    ced.new_process(process_path).save()
+    assert ced.project_ced.exists(process_path)
+
+    ced.get_realpath(process_path).unlink()
+
+    assert ced.open(process_path) is None
+    assert not ced.project_ced.exists(process_path)
+
+
+def test_opening_an_indexed_process_stats_at_most_once(ced, product_ced, mocker):
+    process_path = "CoreContact.Implementation.Contact.Verbs.Stats"
+    product_ced.new_process(process_path).save()
+    ced.open(process_path)
+    stat = mocker.spy(os, "stat")
+
+    assert ced.open(process_path) is not None
+    # the parent folder of the classpath missing in the project
+    assert 1 == stat.call_count
+
+
+def test_index_that_can_not_be_saved_still_answers(ced, cache_home, monkeypatch):
+    not_a_folder = cache_home / "file"
+    not_a_folder.write_text("")
+    monkeypatch.setenv("XDG_CACHE_HOME", str(not_a_folder))
+    index = ClasspathIndex(ced.root)
+
+    assert index.lookup("PRJContact.Implementation.Contact.Verbs.Missing") is None
+    index.save()
@@ -0,0 +1,82 @@
+from emtask.ced import cedobject_factory as of
+from emtask.ced.references import ReferenceIndex
+
+
+def make_caller(ced, path, childprocess_path, imported=True):
+    process = ced.new_process(path)
+
+    if imported:
+        process.add_import(of.make_import(childprocess_path))
+    childprocess_name = childprocess_path.rsplit(".", 1)[1]
+    process.process_def.append(of.make_childprocess(childprocess_name, ("1", "1")))
+
+    return process
+
+
+def test_callers_and_importers_across_roots(ced, product_ced):
+    inline_view = "CoreContact.Implementation.Contact.Processes.InlineView"
+    make_caller(product_ced, "CoreContact.Verbs.ViewContact", inline_view).save()
+    make_caller(ced, "PRJContact.Verbs.ViewContact", inline_view).save()
+    make_caller(
+        product_ced,
+        "CoreContact.Implementation.Contact.Processes.Search",
+        inline_view,
+        imported=False,
+    ).save()
+
+    reference_index = ReferenceIndex(ced)
+
+    assert [
+        "CoreContact.Implementation.Contact.Processes.Search",
+        "CoreContact.Verbs.ViewContact",
+        "PRJContact.Verbs.ViewContact",
+    ] == reference_index.callers(inline_view)
+    assert [
+        "CoreContact.Verbs.ViewContact",
+        "PRJContact.Verbs.ViewContact",
+    ] == reference_index.importers(inline_view)
+
+
+def test_project_process_overrides_product_references(ced, product_ced):
+    path = "CoreContact.Verbs.ViewContact"
+    make_caller(product_ced, path, "CoreContact.Processes.Old").save()
+    assert [path] == ReferenceIndex(ced).callers("CoreContact.Processes.Old")
+
+    make_caller(ced, path, "CoreContact.Processes.New").save()
+    reference_index = ReferenceIndex(ced)
+    reference_index.refresh()
+
+    assert [] == reference_index.callers("CoreContact.Processes.Old")
+    assert [path] == reference_index.callers("CoreContact.Processes.New")
+
+
+def test_callers_of_a_process_rewritten_in_place(ced, product_ced):
+    path = "CoreContact.Verbs.ViewContact"
+    make_caller(product_ced, path, "CoreContact.Processes.Old").save()
+    assert [path] == ReferenceIndex(ced).callers("CoreContact.Processes.Old")
+
+    realpath = product_ced.get_realpath(path)
+    content = make_caller(product_ced, path, "CoreContact.Processes.New").to_bytes()
+    with open(str(realpath), "wb") as f:  # same folder entry, its mtime is kept
+        f.write(content + b"\n")
+    reference_index = ReferenceIndex(ced)
+    reference_index.refresh()
+
+    assert [] == reference_index.callers("CoreContact.Processes.Old")
+    assert [path] == reference_index.callers("CoreContact.Processes.New")
+
+
+def test_queries_within_the_ttl_do_not_rescan(ced, product_ced, mocker):
+    inline_view = "CoreContact.Implementation.Contact.Processes.InlineView"
+    make_caller(product_ced, "CoreContact.Verbs.ViewContact", inline_view).save()
+    ReferenceIndex(ced).refresh()
+    reference_index = ReferenceIndex(ced)
+    refresh = mocker.spy(reference_index, "refresh")
+
+    assert ["CoreContact.Verbs.ViewContact"] == reference_index.callers(inline_view)
+    assert [] == reference_index.importers("CoreContact.Processes.Other")
+    assert 0 == refresh.call_count
+
+    reference_index.ttl = 0
+    reference_index.callers(inline_view)
+    assert 1 == refresh.call_count
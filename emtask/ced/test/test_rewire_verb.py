@@ -1,5 +1,6 @@
 import pytest
 
+from emtask import database
 from emtask.ced.nubia_commands.commands import rewire_verb
 from emtasktest.testutils import sample_project
 
@@ -87,13 +88,18 @@ class FakeCursor(object):
         self.description = []
         self.rows = None
 
-    def execute(self, query):
+    def execute(self, query, params=None):
         self.row = self.rows_to_return[0]
         self.rows = self.rows_to_return
 
         for column_name in self.column_names_to_return:
             self.description.append([column_name])
 
+    def fetchmany(self, size):
+        rows, self.rows = self.rows[:size], self.rows[size:]
+
+        return rows
+
     def __iter__(self):
         return self.rows.__iter__()
 
@@ -110,7 +116,9 @@ def fake_connector(mocker):
     mock = mocker.patch("emtask.database.Connector", autospec=True)
     fake_connector = FakeConnector(mock_connection=mock)
     mock.return_value = fake_connector
+    database.close_pools()
     yield fake_connector
+    database.close_pools()
 
 
 @pytest.fixture
@@ -0,0 +1,124 @@
+import pytest
+
+from emtask.ced import cedobject_factory as of
+from emtask.ced.tasks import RewirePipeline, rewire_verbs, wrap_processes
+from emtask.database import ConnectionPool, PooledDatabase
+from emtask.sql.tasks import VerbDB
+from emtasktest.sqlitedb import SQLiteVerbsDB
+from emtasktest.testutils import sample_project
+
+
+def test_wrap_processes_matching_pattern(ced, product_ced):
+    for verb in ["InlineView", "InlineSearch"]:
+        process = product_ced.new_process(
+            "CoreContact.Implementation.Contact.Verbs." + verb
+        )
+        process.add_field(of.make_field("String", "name"))
+        process.mark_as_parameter("name")
+        process.save()
+
+    process_paths = ced.find("CoreContact.Implementation.*.Verbs.*")
+    results = wrap_processes(ced, process_paths, workers=2)
+
+    assert [None, None] == [result.error for result in results]
+    wrapper = ced.open("CoreContact.Implementation.Contact.Verbs.InlineViewWrapper")
+    assert "name" == wrapper.get_parameters()[0].get("name")
+    assert ced.project_ced.exists(
+        "CoreContact.Implementation.Contact.Verbs.InlineSearchWrapper"
+    )
+
+
+def test_wrap_processes_reports_missing_processes(ced):
+    results = wrap_processes(ced, ["CoreContact.Verbs.Missing"])
+
+    assert isinstance(results[0].error, FileNotFoundError)
+
+
+def test_rewire_verbs_writes_one_script_for_every_verb(mocker, tmp_path):
+    sample_project()
+    verbsdb = SQLiteVerbsDB()
+    verbsdb.add_verb("Contact", "inlineView", "Contact.Verbs.InlineView")
+    verbsdb.add_verb("Contact", "view", "Contact.Verbs.InlineView")
+    verbsdb.add_verb("Customer", "search", "Customer.Verbs.Search")
+    verbsdb.add_verb("Contact", "unused", "PCContact.Verbs.InlineView")
+    db = PooledDatabase(ConnectionPool(verbsdb.connect), dbtype="sqlite")
+    mocker.patch("emtask.sql.tasks.addb", return_value=db)
+
+    invalidate = mocker.patch("emtask.sql.snapshot.VerbSnapshot.invalidate")
+
+    report = rewire_verbs(
+        [
+            ("Contact.Verbs.InlineView", "PCContact.Verbs.InlineView"),
+            ("Customer.Verbs.Missing", "PCCustomer.Verbs.Missing"),
+            ("Customer.Verbs.Search", "PCCustomer.Verbs.Search"),
+        ],
+        script_path=tmp_path / "rewire.sql",
+    )
+
+    assert 3 == report.rewired
+    assert ["Customer.Verbs.Missing"] == report.missing
+    assert ["fetch verbs", "render", "write"] == [t[0] for t in report.timings]
+    invalidate.assert_called_once_with()
+    verbsdb.conn.executescript(report.script_path.read_text())
+    verbs = VerbDB().fetch_many(
+        ["PCContact.Verbs.InlineView", "PCCustomer.Verbs.Search"]
+    )
+    assert ["inlineView", "unused", "view"] == sorted(
+        verb.name for verb in verbs["PCContact.Verbs.InlineView"]
+    )
+    # a new path without a process descriptor is registered by the script
+    assert ["search"] == [verb.name for verb in verbs["PCCustomer.Verbs.Search"]]
+
+
+def test_rewire_verbs_rejects_lines_without_new_path(tmp_path):
+    with pytest.raises(ValueError, match="Customer.Verbs.Search"):
+        rewire_verbs(
+            [
+                ("Contact.Verbs.InlineView", "PCContact.Verbs.InlineView"),
+                ("Customer.Verbs.Search",),
+            ],
+            script_path=tmp_path / "rewire.sql",
+        )
+
+
+def test_rewire_pipeline_reports_failures_and_keeps_going(ced, product_ced, mocker):
+    verbsdb = SQLiteVerbsDB()
+    db = PooledDatabase(ConnectionPool(verbsdb.connect), dbtype="sqlite")
+    mocker.patch("emtask.sql.tasks.addb", return_value=db)
+    rewires = []
+
+    for i in range(10):
+        process_path = "CoreContact.Implementation.Contact.Verbs.Verb{}".format(i)
+        new_path = "PRJContact.Implementation.Contact.Verbs.Verb{}".format(i)
+        rewires.append((process_path, new_path))
+        verbsdb.add_verb("Contact", "verb{}".format(i), process_path)
+
+        if i != 3:
+            product_ced.new_process(process_path).save()
+    rewires.append(("CoreContact.Verbs.NoVerbs", "PRJContact.Verbs.NoVerbs"))
+    rewires.append(("CoreContact.Verbs.NoNewPath",))
+    pipeline = RewirePipeline(ced, workers=2, max_in_flight=3)
+
+    script_path, results = pipeline.run(iter(rewires))
+
+    assert [r[0] for r in rewires] == [result.current_path for result in results]
+    assert isinstance(results[3].error, FileNotFoundError)
+    assert isinstance(results[10].error, LookupError)
+    assert isinstance(results[11].error, ValueError)
+    assert 9 == len([result for result in results if result.error is None])
+    assert ced.project_ced.exists("PRJContact.Implementation.Contact.Verbs.Verb9")
+    assert 9 == script_path.read_text().count("UPDATE EVA_VERB")
+    # the new processes are not deployed yet, the script registers them
+    verbsdb.conn.executescript(script_path.read_text())
+    verbs = VerbDB().fetch_many([new_path for _, new_path in rewires[:10]])
+    assert 9 == len([path for path, verbs in verbs.items() if verbs])
+
+
+def test_commands_use_the_ced_of_the_current_project(ced):
+    from emtask.ced.nubia_commands.commands import _get_ced
+
+    command_ced = _get_ced()
+
+    assert ced.project_ced.root == command_ced.project_ced.root
+    assert ced.product_ced.root == command_ced.product_ced.root
+    assert command_ced is _get_ced()
@@ -1,5 +1,10 @@
+from pathlib import Path
+
+import lxml.etree as ET
 import pytest
 
+from emtask.ced import cedobject_factory as of
+
 
 def assert_file_matches_process(ced, process_path, process):
     loaded_process = ced.open(process_path)
@@ -31,3 +36,84 @@ def test_save_add_process_to_project():
     process = product_ced.new_process(process_path)
     process.save()
     assert process.realpath()
+
+
+def test_saved_process_equals_reopened_one_until_modified(ced):
+    process_path = "PRJContact.Implementation.Contact.InlineContact"
+    process = ced.new_process(process_path)
+    process.save()
+    digest = process.digest()
+
+    assert process == ced.open(process_path)
+
+    process.add_general_procedure("setUp")
+
+    assert digest != process.digest()
+    assert process != ced.open(process_path)
+
+
+def test_saving_unchanged_process_does_not_rewrite_file(ced):
+    process_path = "PRJContact.Implementation.Contact.InlineContact"
+    process = ced.new_process(process_path)
+    assert process.save()
+    mtime = ced.get_realpath(process_path).stat().st_mtime_ns
+
+    assert not ced.open(process_path).save()
+    assert mtime == ced.get_realpath(process_path).stat().st_mtime_ns
+
+
+def test_saving_keeps_the_mode_of_the_file(ced):
+    process_path = "PRJContact.Implementation.Contact.InlineContact"
+    process = ced.new_process(process_path)
+    process.save()
+    realpath = ced.get_realpath(process_path)
+    realpath.chmod(0o640)
+
+    process.add_general_procedure("setUp")
+    assert process.save()
+
+    assert 0o640 == realpath.stat().st_mode & 0o777
+
+
+def test_processes_differ_after_nested_elements_are_edited(ced):
+    process_path = "PRJContact.Implementation.Contact.Verbs.Renamed"
+    process = ced.new_process(process_path)
+    process.add_field(of.make_field("String", "name"))
+    other = process.copy()
+    assert process == other
+
+    process.get_field("name").set("name", "renamed")
+    assert process != other
+
+    other.get_field("name").set("name", "renamed")
+    other.process_def.set("name", "Other")
+    assert process != other
+
+
+def test_whitespace_inside_scripts_is_significant(ced):
+    process = ced.new_process("PRJContact.Implementation.Contact.Verbs.Script")
+    process.add_general_procedure("run")
+    other = process.copy()
+    process.process_def.append(ET.Element("Verbatim"))
+    other.process_def.append(ET.Element("Verbatim"))
+    process.process_def[-1].text = ET.CDATA("run();")
+    other.process_def[-1].text = ET.CDATA("run();\n")
+
+    assert process != other
+
+
+def test_opened_process_is_compared_by_the_digest_of_its_file(ced, mocker):
+    process_path = "PRJContact.Implementation.Contact.Verbs.Opened"
+    process = ced.new_process(process_path)
+    process.save()
+    opened = ced.open(process_path)
+    to_bytes = mocker.spy(type(opened), "to_bytes")
+    read_bytes = mocker.spy(Path, "read_bytes")
+
+    assert process == opened
+    assert not process.save()
+
+    assert 2 == to_bytes.call_count  # the generated process, once for each check
+    assert 0 == read_bytes.call_count
+    opened.add_field(of.make_field("String", "name"))
+    assert process != opened
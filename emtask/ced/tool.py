@@ -1,7 +1,9 @@
 import os
+from fnmatch import fnmatchcase
 from pathlib import Path
 
 from emtask.ced import cedobject_factory
+from emtask.ced.index import ClasspathIndex
 
 
 class CED(object):
@@ -9,15 +11,43 @@ class CED(object):
 
     def __init__(self, project_root):
         self.root = project_root
+        self.index = ClasspathIndex(project_root)
 
     def new_process(self, path):
         return cedobject_factory.make_process(self.root, path)
 
     def open(self, path):
-        if self.get_realpath(path):
-            return cedobject_factory.parse(self, path)
+        entry = self.index.lookup(path)
+
+        if entry is None:
+            return None
+        try:
+            return cedobject_factory.parse(self, path, entry=entry)
+        except FileNotFoundError:
+            # deleted by another tool since it was indexed
+            self.index.discard(path)
+
+            return None
+
+    def exists(self, resource_path):
+        return resource_path in self.index
+
+    def find(self, pattern, doctype="ProcessDefinition"):
+        """Returns the classpaths matching a glob such as
+        CoreEntities.Implementation.*.Verbs.*"""
+
+        return sorted(
+            classpath
+            for classpath in self.index.classpaths(doctype=doctype)
+            if fnmatchcase(classpath, pattern)
+        )
 
     def get_realpath(self, resource_path):
+        entry = self.index.lookup(resource_path)
+
+        if entry is not None:
+            return entry.path
+
         return self.root / Path(resource_path.replace(".", os.sep) + ".xml")
 
 
@@ -31,10 +61,18 @@ class MultiRootCED(object):
         return self.project_ced.new_process(path)
 
     def open(self, path):
-        if self.get_realpath(path).exists():
-            return self.project_ced.open(path)
-        else:
-            return self.product_ced.open(path)
+        process = self.project_ced.open(path)
+
+        if process is None:
+            process = self.product_ced.open(path)
+
+        return process
+
+    def find(self, pattern, doctype="ProcessDefinition"):
+        return sorted(
+            set(self.project_ced.find(pattern, doctype=doctype))
+            | set(self.product_ced.find(pattern, doctype=doctype))
+        )
 
     def get_realpath(self, resource_path):
         return self.project_ced.get_realpath(resource_path)
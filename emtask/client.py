@@ -0,0 +1,70 @@
+"""Thin client of the emtask daemon, see emtask.daemon.
+
+It forwards its command line to the daemon and prints what the command
+writes, exiting with the command exit code:
+
+    python -m emtask.client rewire_verb --current-path Contact.Verbs.InlineView
+
+Only the standard library is imported so it starts in a few milliseconds.
+"""
+
+import json
+import os
+import socket
+import sys
+import tempfile
+
+SOCKET_ENV = "EMTASK_SOCKET"
+
+
+def default_socket_path():
+    return os.environ.get(SOCKET_ENV) or os.path.join(
+        tempfile.gettempdir(), "emtask-{}.sock".format(os.getuid())
+    )
+
+
+def send(request, socket_path=None, stdout=None, stderr=None):
+    """Sends request to the daemon and copies the output streamed back to
+    stdout and stderr, returns the exit code"""
+    stdout = stdout or sys.stdout
+    stderr = stderr or sys.stderr
+
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as conn:
+        conn.connect(socket_path or default_socket_path())
+        conn.sendall(json.dumps(request).encode("utf-8") + b"\n")
+
+        with conn.makefile("r", encoding="utf-8") as replies:
+            for line in replies:
+                reply = json.loads(line)
+
+                if "out" in reply:
+                    stdout.write(reply["out"])
+                    stdout.flush()
+                elif "err" in reply:
+                    stderr.write(reply["err"])
+                    stderr.flush()
+                elif "exit" in reply:
+                    return reply["exit"]
+
+    return 1  # the daemon went away before the command finished
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+
+    if argv == ["--stop"]:
+        request = {"stop": True}
+    else:
+        request = {"argv": argv, "cwd": os.getcwd()}
+    try:
+        return send(request)
+    except (FileNotFoundError, ConnectionRefusedError):
+        sys.stderr.write(
+            "emtask daemon is not running, start it with: python -m emtask.daemon\n"
+        )
+
+        return 2
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,160 @@
+"""Keeps an emtask shell warm behind a unix domain socket.
+
+The daemon loads the commands once and serves the command lines sent by
+emtask.client, so the project config, the CED indexes and process cache
+and the database connection pool survive from one command to the next:
+
+    python -m emtask.daemon --project /path/to/project &
+    python -m emtask.client wrap_process --process-to-wrap ...
+    python -m emtask.client --stop
+
+Commands run one at a time, their output is streamed back to the client.
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import socket
+import socketserver
+import sys
+import threading
+import traceback
+
+from emtask.client import default_socket_path
+
+INTERACTIVE_COMMANDS = ["connect"]
+
+
+class DaemonRunningError(Exception):
+    pass
+
+
+class EMTaskDaemon(socketserver.UnixStreamServer):
+    """Runs the command lines received on socket_path on a shell created
+    once by shell_factory"""
+
+    def __init__(self, shell_factory, socket_path=None):
+        self.socket_path = socket_path or default_socket_path()
+
+        if os.path.exists(self.socket_path):
+            if _is_served(self.socket_path):
+                raise DaemonRunningError(
+                    "An emtask daemon is already listening on " + self.socket_path
+                )
+            os.unlink(self.socket_path)  # left behind by a daemon that died
+        self.shell = shell_factory()
+        super(EMTaskDaemon, self).__init__(self.socket_path, _RequestHandler)
+
+    def run_command(self, argv, stdout, stderr):
+        """Runs a command line on the shell, returns its exit code"""
+        if not argv or argv[0] in INTERACTIVE_COMMANDS:
+            stderr.write("The daemon only runs commands, not the interactive shell\n")
+
+            return 2
+        with contextlib.redirect_stdout(stdout), contextlib.redirect_stderr(stderr):
+            try:
+                return self.shell.run_command(["emtask"] + argv)
+            except SystemExit as e:  # argument errors exit the parser
+                return e.code if isinstance(e.code, int) else 1
+            except Exception:
+                traceback.print_exc()
+
+                return 1
+
+    def server_close(self):
+        super(EMTaskDaemon, self).server_close()
+
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+
+
+def _is_served(socket_path):
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as conn:
+        try:
+            conn.connect(socket_path)
+        except (ConnectionRefusedError, FileNotFoundError):
+            return False
+
+    return True
+
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        line = self.rfile.readline()
+
+        if not line:
+            return  # a connection only checking the daemon is up
+        request = json.loads(line.decode("utf-8"))
+
+        if request.get("stop"):
+            self._reply(exit=0)
+            # shutdown waits for serve_forever, which is running this handler
+            threading.Thread(target=self.server.shutdown).start()
+
+            return
+        cwd = os.getcwd()
+        try:
+            os.chdir(request.get("cwd", cwd))
+            code = self.server.run_command(
+                request["argv"], _StreamWriter(self, "out"), _StreamWriter(self, "err")
+            )
+        finally:
+            os.chdir(cwd)
+        self._reply(exit=code)
+
+    def _reply(self, **message):
+        self.wfile.write(json.dumps(message).encode("utf-8") + b"\n")
+        self.wfile.flush()
+
+
+class _StreamWriter(object):
+    """File like object sending what is written to the client as it comes"""
+
+    def __init__(self, handler, stream):
+        self._handler = handler
+        self._stream = stream
+
+    def write(self, text):
+        if text:
+            self._handler._reply(**{self._stream: text})
+
+        return len(text)
+
+    def flush(self):
+        pass
+
+    def isatty(self):
+        return False
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--socket", help="defaults to $EMTASK_SOCKET")
+    parser.add_argument("--project", help="root of the project commands run on")
+    args = parser.parse_args(argv)
+
+    from emtask.__main__ import make_shell
+
+    if args.project:
+        from emtask import project
+
+        project.set_emproject(project.EMProject(args.project))
+
+    try:
+        daemon = EMTaskDaemon(lambda: make_shell(persistent_history=False), args.socket)
+    except DaemonRunningError as e:
+        sys.stderr.write(str(e) + "\n")
+
+        return 1
+
+    with daemon:
+        print("emtask daemon listening on {}".format(daemon.socket_path))
+        sys.stdout.flush()
+        daemon.serve_forever()
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,7 +1,14 @@
-from sql_gen.database import Connector, EMDatabase
+import threading
+import time
+from contextlib import contextmanager
+
+from sql_gen.database import Connector
 
 from emtask import project
+from emtask.query_stats import get_query_stats
+from emtask.sqlite_database import SQLiteConnector
 
+# (config, PooledDatabase) of the project addb() last answered for
 _addb = None
 
 host = "database.host"
@@ -11,17 +18,290 @@ dbname = "database.name"
 port = "database.port"
 dbtype = "database.type"
 
+POOL_MAX_SIZE = 4
+# connections idle for longer are closed instead of handed out again
+POOL_IDLE_TIMEOUT = 600
+# connections idle for longer are pinged before being handed out
+POOL_PING_AFTER = 60
+POOL_ACQUIRE_TIMEOUT = 30
+# rows fetched per round trip by PooledDatabase.iter_fetch
+FETCH_ARRAYSIZE = 500
+
+_pools = {}
+_pools_lock = threading.Lock()
+
 
 def addb():
-    dbfactory = _DatabaseFactory()
+    """The database of the current project. It is only built again when
+    the project or its config change"""
+    global _addb
+    emproject = project.get_emproject()
+    config = emproject.config()
+    cached = _addb
+
+    if cached is None or cached[0] is not config:
+        cached = _addb = (config, _DatabaseFactory().addb(emproject, config))
+
+    return cached[1]
+
+
+def get_pool(properties):
+    """Returns the connection pool for the connection properties
+    (host, user, password, dbname, port, dbtype), creating it on first use"""
+    with _pools_lock:
+        if properties not in _pools:
+            _pools[properties] = ConnectionPool(_connector(properties).connect)
+
+        return _pools[properties]
+
+
+def _connector(properties):
+    if properties[5] == "sqlite":
+        return SQLiteConnector(properties[3])
+
+    return Connector(*properties)
+
+
+def close_pools():
+    global _addb
+
+    with _pools_lock:
+        _addb = None
+        for pool in _pools.values():
+            pool.close()
+        _pools.clear()
+
+
+class PoolTimeoutError(Exception):
+    pass
+
+
+class ConnectionPool(object):
+    """Keeps up to max_size open connections and hands them out one caller
+    at a time. Connections left idle longer than idle_timeout are closed,
+    those idle longer than ping_after are checked before being reused."""
+
+    def __init__(
+        self,
+        connect,
+        max_size=POOL_MAX_SIZE,
+        idle_timeout=POOL_IDLE_TIMEOUT,
+        ping_after=POOL_PING_AFTER,
+        clock=time.monotonic,
+    ):
+        self._connect = connect
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self.ping_after = ping_after
+        self._clock = clock
+        self._idle = []  # (connection, last used), most recently used last
+        self._size = 0
+        self._condition = threading.Condition()
+
+    @property
+    def size(self):
+        return self._size
+
+    @contextmanager
+    def connection(self, timeout=POOL_ACQUIRE_TIMEOUT):
+        conn = self.acquire(timeout=timeout)
+        try:
+            yield conn
+        except GeneratorExit:
+            # a streaming fetch closed by its consumer, the connection is fine
+            self.release(conn)
+            raise
+        except Exception:
+            self.discard(conn)
+            raise
+        else:
+            self.release(conn)
+
+    def acquire(self, timeout=POOL_ACQUIRE_TIMEOUT):
+        deadline = self._clock() + timeout
+
+        with self._condition:
+            while True:
+                conn = self._take_idle()
+
+                if conn is not None:
+                    return conn
+
+                if self._size < self.max_size:
+                    self._size += 1
+
+                    break
+
+                if not self._condition.wait(deadline - self._clock()):
+                    raise PoolTimeoutError(
+                        "No connection available after {}s".format(timeout)
+                    )
+        try:
+            return self._connect()
+        except Exception:
+            self._forget_one()
+            raise
+
+    def release(self, conn):
+        with self._condition:
+            self._idle.append((conn, self._clock()))
+            self._condition.notify()
+
+    def discard(self, conn):
+        _close(conn)
+        self._forget_one()
+
+    def close(self):
+        with self._condition:
+            for conn, _ in self._idle:
+                _close(conn)
+            self._size -= len(self._idle)
+            self._idle = []
+
+    def _take_idle(self):
+        while self._idle:
+            conn, last_used = self._idle.pop()
+            idle_for = self._clock() - last_used
+
+            if idle_for > self.idle_timeout or (
+                idle_for > self.ping_after and not _is_alive(conn)
+            ):
+                _close(conn)
+                self._size -= 1
+
+                continue
 
-    return dbfactory.addb()
+            return conn
+
+        return None
+
+    def _forget_one(self):
+        with self._condition:
+            self._size -= 1
+            self._condition.notify()
+
+
+def _is_alive(conn):
+    ping = getattr(conn, "ping", None)
+
+    if ping is None:
+        return True
+    try:
+        ping()
+    except Exception:
+        return False
+
+    return True
+
+
+def _close(conn):
+    try:
+        conn.close()
+    except Exception:
+        pass
+
+
+class PooledDatabase(object):
+    """Runs queries on connections borrowed from a pool for the duration of
+    each call"""
+
+    def __init__(self, pool, dbtype=None):
+        self.pool = pool
+        self.dbtype = dbtype
+
+    def placeholder(self, name):
+        """Bind variable marker for the driver of dbtype"""
+        if self.dbtype == "sqlServer":
+            return "%({})s".format(name)
+
+        return ":" + name
+
+    def bind_list(self, name, values):
+        """Returns the placeholders for an IN list and their params"""
+        params = {"{}{}".format(name, i): value for i, value in enumerate(values)}
+
+        return ", ".join(self.placeholder(key) for key in params), params
+
+    def fetch(self, query, params=None):
+        start = time.perf_counter()
+
+        with self.pool.connection() as conn:
+            acquired = time.perf_counter()
+            cursor = conn.cursor()
+            _execute(cursor, query, params)
+            columns = [column[0] for column in cursor.description]
+            rows = [dict(zip(columns, row)) for row in cursor]
+        _record(query, time.perf_counter() - acquired, len(rows), acquired - start)
+
+        return rows
+
+    def iter_fetch(self, query, params=None, arraysize=FETCH_ARRAYSIZE):
+        """Yields the rows as tuples, fetching arraysize of them per round
+        trip. The connection is held until the rows are exhausted or the
+        generator is closed"""
+        start = time.perf_counter()
+
+        with self.pool.connection() as conn:
+            acquired = time.perf_counter()
+            cursor = conn.cursor()
+            cursor.arraysize = arraysize
+            busy = 0.0
+            count = 0
+            try:
+                resumed = time.perf_counter()
+                _execute(cursor, query, params)
+
+                while True:
+                    rows = cursor.fetchmany(arraysize)
+                    # the time the consumer spends on the rows is not counted
+                    busy += time.perf_counter() - resumed
+
+                    if not rows:
+                        break
+                    count += len(rows)
+                    yield from rows
+                    resumed = time.perf_counter()
+            finally:
+                _close(cursor)
+                _record(query, busy, count, acquired - start)
+
+    def execute(self, query, params=None, commit=False):
+        start = time.perf_counter()
+
+        with self.pool.connection() as conn:
+            acquired = time.perf_counter()
+            cursor = conn.cursor()
+            _execute(cursor, query, params)
+
+            if commit:
+                conn.commit()
+        _record(
+            query,
+            time.perf_counter() - acquired,
+            max(getattr(cursor, "rowcount", 0), 0),
+            acquired - start,
+        )
+
+
+def _execute(cursor, query, params):
+    if params is None:
+        cursor.execute(query)
+    else:
+        cursor.execute(query, params)
+
+
+def _record(query, seconds, rows, acquire_seconds):
+    stats = get_query_stats()
+
+    if stats is not None:
+        stats.record(query, seconds, rows=rows, acquire_seconds=acquire_seconds)
 
 
 class _DatabaseFactory(object):
-    def addb(self):
-        global _addb
-        _addb = self._get_db_from_properties(
+    def addb(self, emproject, config):
+        return self._get_db_from_properties(
+            emproject,
+            config,
             host="database.host",
             user="database.user",
             password="database.pass",
@@ -30,19 +310,29 @@ class _DatabaseFactory(object):
             dbtype="database.type",
         )
 
-        return _addb
-
     def _get_db_from_properties(
-        self, host=None, user=None, password=None, dbname=None, port=None, dbtype=None
+        self,
+        emproject,
+        config,
+        host=None,
+        user=None,
+        password=None,
+        dbname=None,
+        port=None,
+        dbtype=None,
     ):
-        config = project.get_emproject().config()
-        connector = Connector(
-            config[host],
-            config[user],
-            config[password],
-            config[dbname],
-            config[port],
-            config[dbtype],
-        )
+        if config[dbtype] == "sqlite":
+            # only the file matters, relative to the project root
+            database = str(emproject.root / config[dbname])
+            properties = (None, None, None, database, None, "sqlite")
+        else:
+            properties = (
+                config[host],
+                config[user],
+                config[password],
+                config[dbname],
+                config[port],
+                config[dbtype],
+            )
 
-        return EMDatabase(connector)
+        return PooledDatabase(get_pool(properties), dbtype=config[dbtype])
@@ -1,19 +1,52 @@
-from nubia import argument, command, context
+import os
+import time
+
+from nubia import argument, command
 from termcolor import cprint
 
+# commands import their implementation when invoked, see
+# emtask.ced.nubia_commands.commands
+
 
 @command
 @argument(
     "sql_release_name",
     description="New folders are created under each sql module, "
     + "e.g Pacificorp_R_0_0_4",
-    choices=["Pacificorp_R_0_0_4"],
 )
-def post_upgrade(sql_release_name: str):
+@argument("dry_run", description="Only report the folders that would be created")
+@argument("workers", description="Number of modules updated concurrently")
+def post_upgrade(sql_release_name: str, dry_run: bool = False, workers: int = 8):
     """
-    Creates folders with new release name and updates patches version
+    Creates a folder with the new release name in every sql module
     """
-    ctx = context.get_context()
-    cprint("Verbose? {}".format(ctx.args.verbose), "yellow")
+    from emtask import project
+    from emtask.project import EMProject
+    from emtask.sql.modules import add_release_to_modules
+
+    emproject = project.get_emproject() or EMProject(os.getcwd())
+    start = time.perf_counter()
+    results = add_release_to_modules(
+        emproject, sql_release_name, dry_run=dry_run, workers=workers
+    )
+    elapsed = time.perf_counter() - start
+
+    for result in results:
+        if result.error:
+            cprint("FAILED {}: {}".format(result.release_path, result.error), "red")
+        elif result.action != "exists":
+            cprint("{} {}".format(result.action, result.release_path), "green")
+    counts = {}
+
+    for result in results:
+        counts[result.action] = counts.get(result.action, 0) + 1
+    cprint(
+        "{} modules in {:.3f}s: {}".format(
+            len(results),
+            elapsed,
+            ", ".join("{} {}".format(n, action) for action, n in counts.items()),
+        ),
+        "yellow",
+    )
 
-    return 0  # optional, by default it's 0
+    return 1 if counts.get("failed") else 0
@@ -0,0 +1,130 @@
+import cProfile
+import io
+import os
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from pathlib import Path
+
+from emtask import project
+
+PROFILES_RELPATH = "work/emtask/profiles"
+TOP_FUNCTIONS = 30
+TOP_ALLOCATIONS = 25
+TRACEMALLOC_FRAMES = 10
+
+# the lines of a parallel batch trace allocations at the same time,
+# tracemalloc is only stopped when the last of them finishes
+_tracemalloc_lock = threading.Lock()
+# only one cProfile can be enabled at a time, python 3.12 raises on the second
+_profiler_lock = threading.Lock()
+_tracemalloc_users = 0
+_tracemalloc_started = False
+
+
+def profiles_path():
+    """Under the work folder of the current project, or of the current
+    directory when no project is set"""
+    emproject = project.get_emproject()
+    root = emproject.root if emproject is not None else Path(os.getcwd())
+
+    return root / PROFILES_RELPATH
+
+
+@contextmanager
+def profiled(name, profile=False, trace_malloc=False, output_path=None):
+    """Runs the block under cProfile and/or tracemalloc and writes what they
+    found to output_path as <name>-<timestamp>.pstats, .profile.txt with the
+    top functions and .malloc.txt with the top allocation sites.
+
+    Blocks running at the same time share tracemalloc, so their allocation
+    reports include each other's allocations. Profiled blocks run one at a
+    time, the others wait for the running one to finish"""
+    if not profile and not trace_malloc:
+        yield
+        return
+    profiler = cProfile.Profile() if profile else None
+
+    if trace_malloc:
+        _start_tracing()
+
+    if profiler:
+        _profiler_lock.acquire()
+        profiler.enable()
+    try:
+        yield
+    finally:
+        if profiler:
+            profiler.disable()
+            _profiler_lock.release()
+        snapshot, peak = _stop_tracing() if trace_malloc else (None, None)
+        output_path = Path(output_path or profiles_path())
+        output_path.mkdir(parents=True, exist_ok=True)
+        now = time.time()
+        prefix = str(
+            output_path
+            / "{}-{}_{:03d}".format(
+                name, time.strftime("%Y%m%d_%H%M%S"), int(now * 1000) % 1000
+            )
+        )
+
+        for path in _write_reports(prefix, profiler, snapshot, peak):
+            print("Profile written to {}".format(path), file=sys.stderr)
+
+
+def _start_tracing():
+    global _tracemalloc_users, _tracemalloc_started
+
+    with _tracemalloc_lock:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(TRACEMALLOC_FRAMES)
+            _tracemalloc_started = True
+        _tracemalloc_users += 1
+
+
+def _stop_tracing():
+    """Returns the snapshot and the peak traced memory, stops tracemalloc
+    if it was started here and nobody else is tracing"""
+    global _tracemalloc_users, _tracemalloc_started
+
+    with _tracemalloc_lock:
+        snapshot = tracemalloc.take_snapshot()
+        peak = tracemalloc.get_traced_memory()[1]
+        _tracemalloc_users -= 1
+
+        if _tracemalloc_users == 0 and _tracemalloc_started:
+            tracemalloc.stop()
+            _tracemalloc_started = False
+
+    return snapshot, peak
+
+
+def _write_reports(prefix, profiler, snapshot, peak):
+    paths = []
+
+    if profiler:
+        paths.append(Path(prefix + ".pstats"))
+        profiler.dump_stats(str(paths[-1]))
+        summary = io.StringIO()
+        stats = pstats.Stats(profiler, stream=summary)
+        stats.sort_stats("cumulative").print_stats(TOP_FUNCTIONS)
+        stats.sort_stats("tottime").print_stats(TOP_FUNCTIONS)
+        paths.append(Path(prefix + ".profile.txt"))
+        paths[-1].write_text(summary.getvalue())
+
+    if snapshot:
+        lines = ["Peak traced memory: {:.1f} KiB".format(peak / 1024), ""]
+
+        for stat in snapshot.statistics("lineno")[:TOP_ALLOCATIONS]:
+            lines.append(str(stat))
+        lines.extend(["", "Largest allocation traceback:"])
+
+        for stat in snapshot.statistics("traceback")[:1]:
+            lines.extend(stat.traceback.format())
+        paths.append(Path(prefix + ".malloc.txt"))
+        paths[-1].write_text("\n".join(lines) + "\n")
+
+    return paths
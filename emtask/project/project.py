@@ -1,3 +1,7 @@
+import os
+import re
+import threading
+from collections import namedtuple
 from pathlib import Path
 
 from sql_gen.emproject.em_project import EMConfigID
@@ -9,11 +13,50 @@ class EMProject(object):
 
     def __init__(self, root):
         self.root = Path(root)
+        self._sqlmodule_index = None
+        self._configs = {}
+        self._configs_lock = threading.Lock()
 
     def config(self, component="ad", machine_name="localhost"):
+        """Returns the config of the component, parsed again only when its
+        show-config file changes. The dict is shared, do not modify it"""
+        key = (component, machine_name)
+        stamp = self._config_stamp(component, machine_name)
+
+        with self._configs_lock:
+            cached = self._configs.get(key)
+
+        if cached is not None and stamp is not None and cached[0] == stamp:
+            return cached[1]
         sqltask_emproject = SQLTaskEMProject(emprj_path=self.root)
+        config = sqltask_emproject.config(
+            EMConfigID("localdev", machine_name, component)
+        )
+
+        with self._configs_lock:
+            self._configs[key] = (stamp, config)
+
+        return config
+
+    def reload_config(self):
+        """Forgets the parsed configs, e.g. after running show-config"""
+        with self._configs_lock:
+            self._configs.clear()
+
+    def config_path(self, component="ad", machine_name="localhost"):
+        return (
+            self.root
+            / "work/config/show-config-txt"
+            / "localdev-{}-{}.txt".format(machine_name, component)
+        )
 
-        return sqltask_emproject.config(EMConfigID("localdev", machine_name, component))
+    def _config_stamp(self, component, machine_name):
+        try:
+            stat = os.stat(self.config_path(component, machine_name))
+        except OSError:
+            return None
+
+        return stat.st_mtime_ns, stat.st_size
 
     def get_repo(self):
         return self.root / "repository/default"
@@ -28,7 +71,34 @@ class EMProject(object):
         return SQLModule(self.root / "modules" / module_name).save()
 
     def sqlmodules(self):
-        return [SQLModule(path) for path in (self.root / "modules").iterdir()]
+        with os.scandir(self.root / "modules") as it:
+            paths = sorted(Path(entry.path) for entry in it if entry.is_dir())
+
+        return [SQLModule(path) for path in paths]
+
+    def sqlmodule_index(self):
+        if self._sqlmodule_index is None:
+            self._sqlmodule_index = SQLModuleIndex(self.root / "modules")
+
+        return self._sqlmodule_index
+
+
+UPDATE_RELPATH = "sqlScripts/oracle/update"
+
+_VERSION_RE = re.compile(r"(?:_\d+)+$")
+
+
+def release_sort_key(release_name):
+    """Sorts release names by the version they end with, e.g.
+    Pacificorp_R_0_0_10 after Pacificorp_R_0_0_9"""
+    match = _VERSION_RE.search(release_name)
+
+    if match is None:
+        return (), release_name
+
+    version = tuple(int(number) for number in match.group()[1:].split("_"))
+
+    return version, release_name
 
 
 class SQLModule:
@@ -36,17 +106,24 @@ class SQLModule:
         self._root = path  # pathlib
         self.name = path.name
 
-    def add_release(self, release_name):
-        release_path = self._update_path() / release_name
-        release_path.mkdir(parents=True)
+    def add_release(self, release_name, exist_ok=False):
+        release_path = self.release_path(release_name)
+        release_path.mkdir(parents=True, exist_ok=exist_ok)
 
         return release_path
 
+    def release_path(self, release_name):
+        return self._update_path() / release_name
+
     def releases(self):
-        return self._update_path().iterdir()
+        """Release folders, oldest version first"""
+        return sorted(
+            (path for path in self._update_path().iterdir() if path.is_dir()),
+            key=lambda path: release_sort_key(path.name),
+        )
 
     def _update_path(self):
-        return self._root / "sqlScripts/oracle/update"
+        return self._root / UPDATE_RELPATH
 
     def save(self):
         self._root.mkdir(parents=True)
@@ -54,6 +131,112 @@ class SQLModule:
         return self
 
 
+ModuleReleases = namedtuple("ModuleReleases", "mtime releases")
+ReleaseScripts = namedtuple("ReleaseScripts", "mtime scripts")
+
+
+class SQLModuleIndex(object):
+    """Modules, their releases sorted by version and the script files of
+    each release, under a project modules folder.
+
+    Every call checks the mtime of the folders indexed and lists again only
+    those that changed since the last call"""
+
+    def __init__(self, modules_path):
+        self.modules_path = Path(modules_path)
+        self._modules_mtime = None
+        self._modules = {}
+        self._lock = threading.Lock()
+
+    def modules(self):
+        with self._lock:
+            self._refresh()
+
+            return sorted(self._modules)
+
+    def releases(self, module_name):
+        """Release names of the module, oldest version first"""
+        with self._lock:
+            self._refresh()
+            module = self._modules.get(module_name)
+
+            return list(module.releases) if module else []
+
+    def latest_release(self, module_name):
+        releases = self.releases(module_name)
+
+        return releases[-1] if releases else None
+
+    def latest_releases(self):
+        """Maps each module with releases to its latest one"""
+        with self._lock:
+            self._refresh()
+
+            return {
+                name: list(module.releases)[-1]
+                for name, module in sorted(self._modules.items())
+                if module.releases
+            }
+
+    def scripts(self, module_name, release_name):
+        with self._lock:
+            self._refresh()
+            module = self._modules.get(module_name)
+            release = module.releases.get(release_name) if module else None
+
+            return list(release.scripts) if release else []
+
+    def _refresh(self):
+        mtime = _mtime(self.modules_path)
+
+        if mtime != self._modules_mtime:
+            self._modules_mtime = mtime
+            known = self._modules
+            self._modules = {
+                name: known.get(name, ModuleReleases(None, {}))
+                for name in _list(self.modules_path, dirs=True)
+            }
+
+        for name, module in self._modules.items():
+            self._modules[name] = self._refresh_module(name, module)
+
+    def _refresh_module(self, name, module):
+        update_path = self.modules_path / name / UPDATE_RELPATH
+        mtime = _mtime(update_path)
+        names = module.releases
+
+        if mtime != module.mtime:
+            names = sorted(_list(update_path, dirs=True), key=release_sort_key)
+        releases = {}
+
+        for release_name in names:
+            release = module.releases.get(release_name)
+            release_mtime = _mtime(update_path / release_name)
+
+            if release is None or release.mtime != release_mtime:
+                release = ReleaseScripts(
+                    release_mtime, sorted(_list(update_path / release_name))
+                )
+            releases[release_name] = release
+
+        return ModuleReleases(mtime, releases)
+
+
+def _mtime(path):
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+
+def _list(path, dirs=False):
+    try:
+        with os.scandir(path) as it:
+            return [entry.name for entry in it if entry.is_dir() == dirs]
+    except OSError:
+        return []
+
+
 _emproject = None
 
 
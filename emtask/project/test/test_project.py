@@ -1,5 +1,7 @@
 import pytest
 
+from emtask.project import project as project_module
+
 
 # for module in project.modules():
 #    module.add_release()
@@ -23,3 +25,47 @@ def test_add_release_to_module(emproject):
     module.add_release("Pacificorp_R_0_0_1")
 
     assert "Pacificorp_R_0_0_1" in [release.name for release in module.releases()]
+
+
+def test_config_is_parsed_again_only_when_its_file_changes(emproject, mocker):
+    parse = mocker.spy(project_module.SQLTaskEMProject, "config")
+    config = emproject.config()
+
+    assert config is emproject.config()
+    assert 1 == parse.call_count
+
+    with emproject.config_path().open("a") as f:
+        f.write("\nemtask.test=changed")
+
+    assert "changed" == emproject.config()["emtask.test"]
+    emproject.reload_config()
+    emproject.config()
+    assert 3 == parse.call_count
+
+
+def test_releases_are_sorted_by_version(emproject):
+    module = emproject.add_sqlmodule("MyTestModule")
+
+    for release in ["Pacificorp_R_0_0_10", "Pacificorp_R_0_0_9", "Pacificorp_R_0_1"]:
+        module.add_release(release)
+
+    assert ["Pacificorp_R_0_0_9", "Pacificorp_R_0_0_10", "Pacificorp_R_0_1"] == [
+        release.name for release in module.releases()
+    ]
+
+
+def test_sqlmodule_index_picks_up_new_releases_and_scripts(emproject):
+    index = emproject.sqlmodule_index()
+    module = emproject.add_sqlmodule("MyTestModule")
+    module.add_release("Pacificorp_R_0_0_9")
+    emproject.add_sqlmodule("EmptyModule")
+
+    assert ["EmptyModule", "MyTestModule"] == index.modules()
+    assert {"MyTestModule": "Pacificorp_R_0_0_9"} == index.latest_releases()
+
+    release_path = module.add_release("Pacificorp_R_0_0_10")
+    (release_path / "add_table.sql").write_text("")
+
+    assert "Pacificorp_R_0_0_10" == index.latest_release("MyTestModule")
+    assert ["add_table.sql"] == index.scripts("MyTestModule", "Pacificorp_R_0_0_10")
+    assert [] == index.releases("EmptyModule")
@@ -0,0 +1,131 @@
+import bisect
+import json
+import re
+import threading
+
+# upper bounds in seconds of the latency histogram buckets, from 50us to ~105s
+BUCKET_BOUNDS = [0.00005 * 2**i for i in range(22)]
+
+_LITERAL_RE = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_PLACEHOLDER_RE = re.compile(r":\w+|%\(\w+\)s|%s|\?")
+_IN_LIST_RE = re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)")
+_SPACES_RE = re.compile(r"\s+")
+
+
+def fingerprint(query):
+    """Normalizes query so the executions of the same statement with
+    different values or IN list lengths are recorded together"""
+    query = _LITERAL_RE.sub("?", query)
+    query = _PLACEHOLDER_RE.sub("?", query)
+    query = _IN_LIST_RE.sub("(?+)", query)
+
+    return _SPACES_RE.sub(" ", query).strip()
+
+
+class QueryStats(object):
+    """In memory latency histograms of the queries run through
+    emtask.database, grouped by fingerprint"""
+
+    def __init__(self):
+        self._queries = {}
+        self._lock = threading.Lock()
+
+    def record(self, query, seconds, rows=0, acquire_seconds=0.0):
+        key = fingerprint(query)
+
+        with self._lock:
+            stats = self._queries.get(key)
+
+            if stats is None:
+                stats = self._queries[key] = _FingerprintStats(key)
+            stats.add(seconds, rows, acquire_seconds)
+
+    def top(self, by="total", limit=10):
+        """Returns the summaries of the queries with the highest total or p95
+        time"""
+        summaries = self.summaries()
+        summaries.sort(key=lambda summary: summary[by], reverse=True)
+
+        return summaries[:limit]
+
+    def summaries(self):
+        with self._lock:
+            return [stats.summary() for stats in self._queries.values()]
+
+    def to_json(self):
+        with self._lock:
+            return json.dumps(
+                {
+                    "bucket_bounds": BUCKET_BOUNDS,
+                    "queries": [
+                        dict(stats.summary(), buckets=list(stats.buckets))
+                        for stats in self._queries.values()
+                    ],
+                },
+                indent=2,
+            )
+
+    def clear(self):
+        with self._lock:
+            self._queries.clear()
+
+
+class _FingerprintStats(object):
+    def __init__(self, fingerprint):
+        self.fingerprint = fingerprint
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.rows = 0
+        self.acquire_total = 0.0
+        # the last bucket counts what is above the last bound
+        self.buckets = [0] * (len(BUCKET_BOUNDS) + 1)
+
+    def add(self, seconds, rows, acquire_seconds):
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+        self.rows += rows
+        self.acquire_total += acquire_seconds
+        self.buckets[bisect.bisect_left(BUCKET_BOUNDS, seconds)] += 1
+
+    def percentile(self, fraction):
+        """Upper bound of the bucket holding the percentile, capped by the
+        slowest execution"""
+        threshold = fraction * self.count
+        seen = 0
+
+        for i, count in enumerate(self.buckets):
+            seen += count
+
+            if count and seen >= threshold:
+                bound = BUCKET_BOUNDS[i] if i < len(BUCKET_BOUNDS) else self.max
+
+                return min(bound, self.max)
+
+        return 0.0
+
+    def summary(self):
+        return {
+            "fingerprint": self.fingerprint,
+            "count": self.count,
+            "total": self.total,
+            "mean": self.total / self.count,
+            "p95": self.percentile(0.95),
+            "max": self.max,
+            "rows": self.rows,
+            "acquire_total": self.acquire_total,
+        }
+
+
+_query_stats = QueryStats()
+
+
+def get_query_stats():
+    return _query_stats
+
+
+def set_query_stats(stats):
+    """Replaces where queries are recorded, None disables the recording"""
+    global _query_stats
+    _query_stats = stats
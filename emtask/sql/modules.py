@@ -0,0 +1,37 @@
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+ReleaseResult = namedtuple("ReleaseResult", "module release_path action error")
+
+
+def add_release_to_modules(emproject, release_name, dry_run=False, workers=8):
+    """Creates the release folder in every sql module of emproject. Modules
+    that already have it are left as they are, so it can be run again after
+    a partial failure. With dry_run nothing is created, the results tell
+    what would be"""
+    modules = emproject.sqlmodules()
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        return list(
+            executor.map(
+                lambda module: _add_release(module, release_name, dry_run), modules
+            )
+        )
+
+
+def _add_release(module, release_name, dry_run):
+    release_path = module.release_path(release_name)
+    try:
+        if release_path.is_dir():
+            action = "exists"
+        elif dry_run:
+            action = "would create"
+        else:
+            module.add_release(release_name, exist_ok=True)
+            action = "created"
+        error = None
+    except OSError as e:
+        action = "failed"
+        error = e
+
+    return ReleaseResult(module.name, release_path, action, error)
@@ -1,6 +1,8 @@
 from termcolor import cprint
 from nubia import command, argument, context
-from sql_gen.commands import RunSQLCommand
+
+# commands import their implementation when invoked, see
+# emtask.ced.nubia_commands.commands
 
 templates=["test", "toast", "toad"]
 #@argument("template", description="Pick a style", choices=templates)
@@ -9,6 +11,8 @@ def run_sql():
     """
     This will generate an sql script from a template and will run it on db
     """
+    from sql_gen.commands import RunSQLCommand
+
     ctx = pepe()
     cprint("Verbose? {}".format(ctx.args.verbose), "yellow")
     return RunSQLCommand().run()
@@ -20,3 +24,63 @@ def pepe():
     ctx = context.get_context()
     return ctx
 
+
+
+@command
+@argument("full", description="Pull every verb instead of only the new ones")
+def refresh_verbs_snapshot(full: bool = False):
+    """
+    It copies the verbs from db into the local snapshot used for verb lookups
+    """
+    from emtask.database import addb
+    from emtask.sql.snapshot import get_verb_snapshot
+
+    pulled = get_verb_snapshot().refresh(addb(), full=full)
+    cprint("{} verbs pulled into {}".format(pulled, get_verb_snapshot().path), "green")
+
+    return 0
+
+
+@command
+@argument("sort", description="Rank queries by", choices=["total", "p95"])
+@argument("limit", description="Number of queries shown")
+@argument("json_file", description="Also dump every histogram to this file")
+@argument("reset", description="Forget the queries recorded so far")
+def db_stats(
+    sort: str = "total", limit: int = 10, json_file: str = None, reset: bool = False
+):
+    """
+    It shows the queries that took the most database time in this session
+    """
+    from emtask.query_stats import get_query_stats
+
+    stats = get_query_stats()
+
+    if stats is None:
+        cprint("Query stats are disabled", "red")
+
+        return 1
+    cprint(
+        "{:>6} {:>9} {:>9} {:>9} {:>8} {:>9}  {}".format(
+            "count", "total s", "p95 ms", "max ms", "rows", "acquire s", "query"
+        ),
+        "yellow",
+    )
+
+    for summary in stats.top(by=sort, limit=limit):
+        print(
+            "{count:>6} {total:>9.3f} {p95_ms:>9.1f} {max_ms:>9.1f} {rows:>8}"
+            " {acquire_total:>9.3f}  {fingerprint:.100}".format(
+                p95_ms=summary["p95"] * 1000, max_ms=summary["max"] * 1000, **summary
+            )
+        )
+
+    if json_file:
+        with open(json_file, "w") as f:
+            f.write(stats.to_json())
+        cprint("Query stats written to {}".format(json_file), "green")
+
+    if reset:
+        stats.clear()
+
+    return 0
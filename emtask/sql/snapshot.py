@@ -0,0 +1,178 @@
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+from emtask import project
+from emtask.database import FETCH_ARRAYSIZE
+
+SNAPSHOT_RELPATH = "work/emtask/verbs.sqlite"
+# lookups go to the live database once the last full refresh is older than
+# this, incremental refreshes only pull new verbs and do not extend it as they
+# can not see rewired or deleted verbs
+SNAPSHOT_TTL = 3600
+
+VERB_JOINS = (
+    " FROM CCADMIN_IDMAP ci , EVA_VERB v, EVA_PROCESS_DESC_REFERENCE pdr,"
+    " EVA_PROCESS_DESCRIPTOR PD"
+    " WHERE v.PROCESS_DESC_REF_ID  = pdr.id"
+    " AND pdr.PROCESS_DESCRIPTOR_ID  = pd.id"
+    " AND ci.KEYSET ='ED'"
+    " AND ci.ID =v.ENTITY_DEF_ID"
+)
+
+_VERBS_SINCE = (
+    "SELECT v.ID as VERB_ID, ci.KEYNAME as ENTITY_KEYNAME, v.NAME,"
+    " pd.REPOSITORY_PATH" + VERB_JOINS + " AND v.ID > {}"
+)
+
+_SCHEMA = [
+    "CREATE TABLE IF NOT EXISTS VERB (VERB_ID INTEGER PRIMARY KEY,"
+    " ENTITY_KEYNAME TEXT, NAME TEXT, REPOSITORY_PATH TEXT)",
+    "CREATE INDEX IF NOT EXISTS VERB_REPOSITORY_PATH ON VERB (REPOSITORY_PATH)",
+    "CREATE TABLE IF NOT EXISTS META (KEY TEXT PRIMARY KEY, VALUE REAL)",
+]
+
+
+_snapshots = {}
+_snapshots_lock = threading.Lock()
+
+
+def get_verb_snapshot():
+    """Returns the snapshot of the current project, the same instance for
+    the session so its connection is reused"""
+    path = project.get_emproject().root / SNAPSHOT_RELPATH
+
+    with _snapshots_lock:
+        verb_snapshot = _snapshots.get(path)
+
+        if verb_snapshot is None:
+            verb_snapshot = _snapshots[path] = VerbSnapshot(path)
+
+    return verb_snapshot
+
+
+class VerbSnapshot(object):
+    """Local sqlite copy of the verbs projection queried by VerbDB: entity
+    keyname, verb name and repository path of each verb.
+
+    It is refreshed from the live database on demand. A full refresh copies
+    every verb and keeps the snapshot fresh for ttl seconds, while it is
+    fresh a refresh only pulls the verbs created since the last one.
+    One connection is kept per snapshot and shared by the threads using it."""
+
+    def __init__(self, path, ttl=SNAPSHOT_TTL, clock=time.time):
+        self.path = Path(path)
+        self.ttl = ttl
+        self._clock = clock
+        self._conn = None
+        self._lock = threading.RLock()
+
+    def is_fresh(self):
+        refreshed = self._meta("full_refreshed")
+
+        return refreshed is not None and self._clock() - refreshed < self.ttl
+
+    def invalidate(self):
+        """Forces lookups to the live database until the next full refresh,
+        e.g. after the verbs have been changed"""
+        with self._lock:
+            conn = self._connect(create=False)
+
+            if conn is not None:
+                with conn:
+                    conn.execute("DELETE FROM META WHERE KEY = 'full_refreshed'")
+
+    def refresh(self, db, full=False):
+        """Pulls the verbs from db, returns the number of rows pulled. It is
+        a full refresh unless the snapshot is fresh"""
+        full = full or not self.is_fresh()
+        last_id = -1 if full else self._meta("max_verb_id")
+        rows = db.iter_fetch(
+            _VERBS_SINCE.format(db.placeholder("last_id")),
+            params={"last_id": last_id},
+        )
+        now = self._clock()
+
+        with self._lock, self._connect() as conn:
+            if full:
+                conn.execute("DELETE FROM VERB")
+                self._set_meta(conn, "full_refreshed", now)
+            pulled = conn.executemany(
+                "INSERT OR REPLACE INTO VERB VALUES (?, ?, ?, ?)", rows
+            ).rowcount
+            (max_id,) = conn.execute("SELECT MAX(VERB_ID) FROM VERB").fetchone()
+            self._set_meta(conn, "max_verb_id", -1 if max_id is None else max_id)
+
+        return pulled
+
+    def fetch(self, query, params=None):
+        """Runs query on the snapshot, rows are returned as dicts like
+        PooledDatabase.fetch does"""
+        with self._lock:
+            cursor = self._connect().execute(query, params or {})
+            columns = [column[0] for column in cursor.description]
+
+            return [dict(zip(columns, row)) for row in cursor]
+
+    def iter_fetch(self, query, params=None, arraysize=FETCH_ARRAYSIZE):
+        """Yields the rows as tuples like PooledDatabase.iter_fetch does"""
+        with self._lock:
+            cursor = self._connect().execute(query, params or {})
+
+        while True:
+            with self._lock:
+                rows = cursor.fetchmany(arraysize)
+
+            if not rows:
+                break
+            yield from rows
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def placeholder(self, name):
+        return ":" + name
+
+    def bind_list(self, name, values):
+        params = {"{}{}".format(name, i): value for i, value in enumerate(values)}
+
+        return ", ".join(self.placeholder(key) for key in params), params
+
+    def _meta(self, key):
+        with self._lock:
+            conn = self._connect(create=False)
+
+            if conn is None:
+                return None
+            row = conn.execute("SELECT VALUE FROM META WHERE KEY = ?", (key,))
+            row = row.fetchone()
+
+        return None if row is None else row[0]
+
+    def _set_meta(self, conn, key, value):
+        conn.execute("INSERT OR REPLACE INTO META VALUES (?, ?)", (key, value))
+
+    def _connect(self, create=True):
+        """Returns the connection of the snapshot, opened and given its
+        schema on first use. Without create it returns None when there is no
+        snapshot file yet. Callers hold the lock"""
+        if not self.path.exists():
+            self.close()  # removed under us, e.g. with the work folder
+
+            if not create:
+                return None
+
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.path), check_same_thread=False)
+
+            with conn:
+                for statement in _SCHEMA:
+                    conn.execute(statement)
+            self._conn = conn
+
+        return self._conn
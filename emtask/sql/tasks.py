@@ -1,17 +1,23 @@
+import re
+from collections import namedtuple
+from pathlib import Path
+
 from sql_gen.commands import CreateSQLTaskCommand
 from sql_gen.database import Connector, EMDatabase
 
 from emtask.database import addb
+from emtask.sql.snapshot import VERB_JOINS, get_verb_snapshot
 
 
 class RewireVerbSQLTask(object):
     def create_rewire_verb_template(self, verb, new_path):
         self._create_sql(
             "rewire_verb.sql",
-            entity_def_id=verb._entity_keyname,
-            verb_name=verb._name,
+            entity_def_id=verb.entity_keyname,
+            verb_name=verb.name,
             new_pd_path=new_path,
         )
+        get_verb_snapshot().invalidate()
 
     def _create_sql(self, *args, **kwargs):
         template_values = dict(**kwargs)
@@ -20,6 +26,110 @@ class RewireVerbSQLTask(object):
         ).run()
 
 
+# registers the process descriptor and reference of a new path when it has
+# none yet, as a process generated by emtask is not deployed when its verbs
+# are rewired. Only the columns emtask knows about are filled
+_REGISTER_PROCESS_SQL = """-- register {comment}
+INSERT INTO EVA_PROCESS_DESCRIPTOR (ID, REPOSITORY_PATH)
+SELECT ids.NEXT_ID, {new_pd_path}
+FROM (SELECT COALESCE(MAX(ID), 0) + 1 AS NEXT_ID FROM EVA_PROCESS_DESCRIPTOR) ids
+WHERE NOT EXISTS (
+    SELECT 1 FROM EVA_PROCESS_DESCRIPTOR WHERE REPOSITORY_PATH = {new_pd_path});
+INSERT INTO EVA_PROCESS_DESC_REFERENCE (ID, PROCESS_DESCRIPTOR_ID)
+SELECT ids.NEXT_ID, pd.ID
+FROM (SELECT COALESCE(MAX(ID), 0) + 1 AS NEXT_ID FROM EVA_PROCESS_DESC_REFERENCE) ids,
+    EVA_PROCESS_DESCRIPTOR pd
+WHERE pd.ID = (
+    SELECT MIN(ID) FROM EVA_PROCESS_DESCRIPTOR WHERE REPOSITORY_PATH = {new_pd_path})
+AND NOT EXISTS (
+    SELECT 1 FROM EVA_PROCESS_DESC_REFERENCE pdr, EVA_PROCESS_DESCRIPTOR pd
+    WHERE pdr.PROCESS_DESCRIPTOR_ID = pd.ID AND pd.REPOSITORY_PATH = {new_pd_path});
+"""
+
+_REWIRE_VERB_SQL = """-- {comment}
+UPDATE EVA_VERB SET PROCESS_DESC_REF_ID = (
+    SELECT MIN(pdr.ID) FROM EVA_PROCESS_DESC_REFERENCE pdr, EVA_PROCESS_DESCRIPTOR pd
+    WHERE pdr.PROCESS_DESCRIPTOR_ID = pd.ID AND pd.REPOSITORY_PATH = {new_pd_path})
+WHERE NAME = {verb_name}
+AND ENTITY_DEF_ID = (
+    SELECT ID FROM CCADMIN_IDMAP WHERE KEYSET = 'ED' AND KEYNAME = {entity_def_id});
+"""
+
+
+class RewireVerbsSQLTask(object):
+    """Renders the rewiring of many verbs into one script. The process
+    descriptor of each new path is registered first when it has none, then
+    the verbs are pointed to it"""
+
+    def render(self, rewires):
+        """rewires are (verb, new_path) pairs"""
+        statements = []
+        new_paths = set()
+
+        for verb, new_path in rewires:
+            if new_path not in new_paths:
+                new_paths.add(new_path)
+                statements.append(
+                    _REGISTER_PROCESS_SQL.format(
+                        comment=new_path, new_pd_path=_quote(new_path)
+                    )
+                )
+            statements.append(
+                _REWIRE_VERB_SQL.format(
+                    comment="{}.{}: {} -> {}".format(
+                        verb.entity_keyname, verb.name, verb.repository_path, new_path
+                    ),
+                    entity_def_id=_quote(verb.entity_keyname),
+                    verb_name=_quote(verb.name),
+                    new_pd_path=_quote(new_path),
+                )
+            )
+
+        return "\n".join(statements)
+
+    def write(self, script, path):
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(script)
+        get_verb_snapshot().invalidate()
+
+        return path
+
+
+def _quote(value):
+    return "'" + value.replace("'", "''") + "'"
+
+
+# Oracle does not allow more than 1000 expressions in an IN list
+IN_LIST_SIZE = 900
+
+_VERBS_BY_REPOSITORY_PATH = (
+    "SELECT ci.KEYNAME as ENTITY_KEYNAME, v.NAME, pd.REPOSITORY_PATH"
+    + VERB_JOINS
+    + " AND pd.REPOSITORY_PATH {}"
+)
+_SNAPSHOT_VERBS_BY_REPOSITORY_PATH = (
+    "SELECT ENTITY_KEYNAME, NAME, REPOSITORY_PATH FROM VERB WHERE REPOSITORY_PATH {}"
+)
+
+
+def _verbs_source():
+    """Returns the local snapshot while it is fresh, the live database
+    otherwise, with the query to run on it"""
+    snapshot = get_verb_snapshot()
+
+    if snapshot.is_fresh():
+        return snapshot, _SNAPSHOT_VERBS_BY_REPOSITORY_PATH
+
+    return addb(), _VERBS_BY_REPOSITORY_PATH
+
+
+class VerbRecord(namedtuple("VerbRecord", "entity_keyname name repository_path")):
+    """A verb as read from db, rows are kept as compact tuples"""
+
+    __slots__ = ()
+
+
 class VerbDB(object):
     def __init__(self, entity_keyname=None, name=None, repository_path=None):
         self._entity_keyname = entity_keyname
@@ -27,27 +137,46 @@ class VerbDB(object):
         self._repository_path = repository_path
 
     def fetch(self, repository_path=None):
-        v_by_repo_path = (
-            "SELECT ci.KEYNAME as ENTITY_KEYNAME, v.NAME, pd.REPOSITORY_PATH"
-            " FROM CCADMIN_IDMAP ci , EVA_VERB v, EVA_PROCESS_DESC_REFERENCE pdr,"
-            " EVA_PROCESS_DESCRIPTOR PD"
-            " WHERE v.PROCESS_DESC_REF_ID  = pdr.id"
-            " AND pdr.PROCESS_DESCRIPTOR_ID  = pd.id"
-            " AND ci.KEYSET ='ED'"
-            " AND ci.ID =v.ENTITY_DEF_ID"
-            " AND pd.REPOSITORY_PATH ='{}';"
-        )
+        return list(self.iter_fetch("= ", repository_path))
 
-        return self.convert_from_db_fetch(
-            addb().fetch(v_by_repo_path.format(repository_path))
-        )
+    def fetch_prefix(self, repository_path_prefix):
+        """Yields the verbs of every repository path starting with the
+        prefix, e.g. all the verbs of an entity. Rows are streamed from the
+        cursor so large results are never held in memory at once"""
+        prefix = re.sub(r"([\\%_])", r"\\\1", repository_path_prefix) + "%"
 
-    def convert_from_db_fetch(self, table):
-        result = []
+        return self.iter_fetch("LIKE ", prefix, suffix=" ESCAPE '\\'")
 
-        for row in table:
-            result.append(
-                VerbDB(row["ENTITY_KEYNAME"], row["NAME"], self._repository_path)
-            )
+    def iter_fetch(self, operator, repository_path, suffix=""):
+        db, query = _verbs_source()
+        query = query.format(operator + db.placeholder("path") + suffix)
+
+        for row in db.iter_fetch(query, params={"path": repository_path}):
+            yield VerbRecord._make(row)
+
+    def fetch_many(self, repository_paths):
+        """Fetches the verbs of many repository paths with a query per
+        IN_LIST_SIZE paths, returns them grouped by repository path"""
+        db, query = _verbs_source()
+        result = {path: [] for path in repository_paths}
+        paths = list(result)
+
+        for start in range(0, len(paths), IN_LIST_SIZE):
+            in_list, params = db.bind_list("path", paths[start : start + IN_LIST_SIZE])
+            in_query = query.format("IN (" + in_list + ")")
+
+            for row in db.iter_fetch(in_query, params=params):
+                verb = VerbRecord._make(row)
+                result.setdefault(verb.repository_path, []).append(verb)
 
         return result
+
+    def convert_from_db_fetch(self, table):
+        return [
+            VerbRecord(
+                row["ENTITY_KEYNAME"],
+                row["NAME"],
+                row.get("REPOSITORY_PATH", self._repository_path),
+            )
+            for row in table
+        ]
@@ -0,0 +1,32 @@
+from emtask.sql.modules import add_release_to_modules
+from emtasktest.testutils import sample_project
+
+
+def test_add_release_to_every_module_is_idempotent():
+    emproject = sample_project()
+
+    for i in range(20):
+        emproject.add_sqlmodule("Module{}".format(i))
+    emproject.sqlmodules()[0].add_release("Pacificorp_R_0_0_4")
+
+    results = add_release_to_modules(emproject, "Pacificorp_R_0_0_4")
+
+    assert 19 == [result.action for result in results].count("created")
+    assert all(
+        "Pacificorp_R_0_0_4" in [release.name for release in module.releases()]
+        for module in emproject.sqlmodules()
+    )
+    assert {"exists"} == {
+        result.action
+        for result in add_release_to_modules(emproject, "Pacificorp_R_0_0_4")
+    }
+
+
+def test_dry_run_does_not_create_releases():
+    emproject = sample_project()
+    module = emproject.add_sqlmodule("Module")
+
+    results = add_release_to_modules(emproject, "Pacificorp_R_0_0_4", dry_run=True)
+
+    assert ["would create"] == [result.action for result in results]
+    assert not module.release_path("Pacificorp_R_0_0_4").exists()
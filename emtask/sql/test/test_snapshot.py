@@ -0,0 +1,95 @@
+import pytest
+
+from emtask.database import ConnectionPool, PooledDatabase
+from emtask.sql import snapshot
+from emtask.sql.tasks import VerbDB
+from emtasktest.sqlitedb import SQLiteVerbsDB
+from emtasktest.testutils import sample_project
+
+
+class FakeClock(object):
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def verbsdb():
+    yield SQLiteVerbsDB().add_verb("Contact", "inlineView", "Contact.Verbs.Inline")
+
+
+@pytest.fixture
+def live_db(verbsdb, mocker):
+    db = PooledDatabase(ConnectionPool(verbsdb.connect), dbtype="sqlite")
+    yield mocker.patch("emtask.sql.tasks.addb", return_value=db)
+
+
+@pytest.fixture
+def verb_snapshot(tmp_path):
+    yield snapshot.VerbSnapshot(tmp_path / "verbs.sqlite", ttl=60, clock=FakeClock())
+
+
+def test_snapshot_is_fresh_until_ttl_expires(verb_snapshot, live_db):
+    assert not verb_snapshot.is_fresh()
+
+    verb_snapshot.refresh(live_db())
+
+    assert verb_snapshot.is_fresh()
+    verb_snapshot._clock.now += 60
+    assert not verb_snapshot.is_fresh()
+
+
+def test_refresh_only_pulls_new_verbs(verb_snapshot, verbsdb, live_db):
+    assert 1 == verb_snapshot.refresh(live_db())
+    verbsdb.add_verb("Contact", "search", "Contact.Verbs.Search")
+
+    assert 1 == verb_snapshot.refresh(live_db())
+    assert 2 == verb_snapshot.refresh(live_db(), full=True)
+
+
+def test_only_full_refreshes_keep_the_snapshot_fresh(verb_snapshot, live_db):
+    verb_snapshot.refresh(live_db())
+    verb_snapshot._clock.now += 50
+    verb_snapshot.refresh(live_db())
+    verb_snapshot._clock.now += 10
+
+    assert not verb_snapshot.is_fresh()
+
+    verb_snapshot.refresh(live_db())
+    assert verb_snapshot.is_fresh()
+    verb_snapshot.invalidate()
+    assert not verb_snapshot.is_fresh()
+
+
+def test_full_refresh_drops_deleted_verbs(verb_snapshot, verbsdb, live_db):
+    verb_snapshot.refresh(live_db())
+    verbsdb.conn.execute("DELETE FROM EVA_VERB")
+    verb_snapshot._clock.now += verb_snapshot.ttl
+
+    verb_snapshot.refresh(live_db())
+
+    assert [] == verb_snapshot.fetch("SELECT * FROM VERB")
+
+
+def test_verbdb_reads_fresh_snapshot(verbsdb, live_db):
+    emproject = sample_project()
+    verb_snapshot = snapshot.get_verb_snapshot()
+    verb_snapshot.refresh(live_db())
+    verbsdb.conn.execute("DELETE FROM EVA_VERB")
+
+    verbs = VerbDB().fetch_many(["Contact.Verbs.Inline"])
+
+    assert ["inlineView"] == [v.name for v in verbs["Contact.Verbs.Inline"]]
+    assert emproject.root / "work" in verb_snapshot.path.parents
+
+    verb_snapshot.invalidate()
+
+    assert {"Contact.Verbs.Inline": []} == VerbDB().fetch_many(["Contact.Verbs.Inline"])
+
+
+def test_project_snapshot_is_shared_by_lookups(verbsdb, live_db):
+    sample_project()
+
+    assert snapshot.get_verb_snapshot() is snapshot.get_verb_snapshot()
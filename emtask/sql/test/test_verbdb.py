@@ -0,0 +1,60 @@
+import pytest
+
+from emtask.database import ConnectionPool, PooledDatabase
+from emtask.sql.tasks import VerbDB, VerbRecord
+from emtasktest.sqlitedb import SQLiteVerbsDB
+from emtasktest.testutils import sample_project
+
+
+@pytest.fixture
+def verbsdb(mocker):
+    sample_project()
+    verbsdb = SQLiteVerbsDB()
+    db = PooledDatabase(ConnectionPool(verbsdb.connect), dbtype="sqlite")
+    mocker.patch("emtask.sql.tasks.addb", return_value=db)
+    yield verbsdb
+
+
+def test_fetch_verbs_by_repository_path(verbsdb):
+    verbsdb.add_verb("Contact", "inlineView", "Contact.Verbs.InlineView")
+    verbsdb.add_verb("Customer", "inlineView", "Customer.Verbs.InlineView")
+
+    verbs = VerbDB().fetch(repository_path="Contact.Verbs.InlineView")
+
+    assert [("Contact", "inlineView")] == [(v.entity_keyname, v.name) for v in verbs]
+
+
+def test_fetch_many_groups_verbs_by_repository_path(verbsdb, mocker):
+    mocker.patch("emtask.sql.tasks.IN_LIST_SIZE", 2)
+    verbsdb.add_verb("Contact", "inlineView", "Contact.Verbs.InlineView")
+    verbsdb.add_verb("Contact", "view", "Contact.Verbs.InlineView")
+    verbsdb.add_verb("Customer", "search", "Customer.Verbs.Search")
+    verbsdb.add_verb("Account", "edit", "Account.Verbs.Edit")
+
+    verbs = VerbDB().fetch_many(
+        ["Contact.Verbs.InlineView", "Customer.Verbs.Search", "Account.Verbs.Edit"]
+        + ["Contact.Verbs.Missing"]
+    )
+
+    assert ["inlineView", "view"] == sorted(
+        v.name for v in verbs["Contact.Verbs.InlineView"]
+    )
+    assert ["search"] == [v.name for v in verbs["Customer.Verbs.Search"]]
+    assert ["edit"] == [v.name for v in verbs["Account.Verbs.Edit"]]
+    assert [] == verbs["Contact.Verbs.Missing"]
+
+
+def test_fetch_prefix_streams_verbs_of_matching_paths(verbsdb):
+    verbsdb.add_verb("Contact", "inlineView", "Contact.Verbs.InlineView")
+    verbsdb.add_verb("Contact", "search", "Contact.Verbs.Search")
+    verbsdb.add_verb("Contacts", "search", "Contacts.Verbs.Search")
+    verbsdb.add_verb("Contact_", "search", "Contact_.Verbs.Search")
+
+    verbs = VerbDB().fetch_prefix("Contact.")
+
+    assert not isinstance(verbs, list)
+    assert [
+        VerbRecord("Contact", "inlineView", "Contact.Verbs.InlineView"),
+        VerbRecord("Contact", "search", "Contact.Verbs.Search"),
+    ] == sorted(verbs)
+    assert ["Contact_"] == [v.entity_keyname for v in VerbDB().fetch_prefix("Contact_")]
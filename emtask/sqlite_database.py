@@ -0,0 +1,37 @@
+import sqlite3
+
+# subset of the EVA and CCADMIN tables queried by emtask, with the indexes the
+# product schema has on them
+SCHEMA = [
+    "CREATE TABLE IF NOT EXISTS CCADMIN_IDMAP"
+    " (ID INTEGER, KEYSET TEXT, KEYNAME TEXT, PRIMARY KEY (KEYSET, ID))",
+    "CREATE TABLE IF NOT EXISTS EVA_PROCESS_DESCRIPTOR"
+    " (ID INTEGER PRIMARY KEY, REPOSITORY_PATH TEXT)",
+    "CREATE INDEX IF NOT EXISTS EVA_PROCESS_DESCRIPTOR_PATH"
+    " ON EVA_PROCESS_DESCRIPTOR (REPOSITORY_PATH)",
+    "CREATE TABLE IF NOT EXISTS EVA_PROCESS_DESC_REFERENCE"
+    " (ID INTEGER PRIMARY KEY, PROCESS_DESCRIPTOR_ID INTEGER)",
+    "CREATE INDEX IF NOT EXISTS EVA_PROCESS_DESC_REFERENCE_PD"
+    " ON EVA_PROCESS_DESC_REFERENCE (PROCESS_DESCRIPTOR_ID)",
+    "CREATE TABLE IF NOT EXISTS EVA_VERB (ID INTEGER PRIMARY KEY, NAME TEXT,"
+    " ENTITY_DEF_ID INTEGER, PROCESS_DESC_REF_ID INTEGER)",
+    "CREATE INDEX IF NOT EXISTS EVA_VERB_PDR ON EVA_VERB (PROCESS_DESC_REF_ID)",
+]
+
+
+class SQLiteConnector(object):
+    """Local stand-in for the project database, used when database.type is
+    sqlite. database.name is the path of the sqlite file, the tables
+    queried by emtask are created on first connection"""
+
+    def __init__(self, database):
+        self.database = str(database)
+
+    def connect(self):
+        conn = sqlite3.connect(self.database, check_same_thread=False)
+
+        with conn:
+            for statement in SCHEMA:
+                conn.execute(statement)
+
+        return conn
@@ -0,0 +1,44 @@
+import threading
+
+from nubia import Nubia, context
+
+from emtask.__main__ import format_timings, make_shell
+
+
+def test_batch_stops_at_first_failure_unless_keep_going(capsys):
+    lines = ["# stats", "db-stats --limit 1", "", "no-such-command", "db-stats"]
+    shell = make_shell(persistent_history=False)
+
+    stopped = shell.run_batch(lines)
+    kept_going = shell.run_batch(lines, keep_going=True)
+
+    assert [0, 2] == [result.code for result in stopped]
+    assert [0, 2, 0] == [result.code for result in kept_going]
+    assert "3 commands, 1 failed" in format_timings(kept_going)
+
+
+def test_batch_runs_lines_in_parallel():
+    shell = make_shell(persistent_history=False)
+
+    results = shell.run_batch(
+        ["db-stats --limit {}".format(i) for i in range(8)], workers=4
+    )
+
+    assert [0] * 8 == [result.code for result in results]
+    assert "db-stats --limit 7" == results[-1].line
+
+
+def test_parallel_lines_read_their_own_context_args(mocker):
+    both_parsed = threading.Barrier(2, timeout=5)
+
+    def run_cli(shell, args):
+        both_parsed.wait()
+
+        return 0 if context.get_context().args.limit == args.limit else 1
+
+    mocker.patch.object(Nubia, "run_cli", run_cli)
+    shell = make_shell(persistent_history=False)
+
+    results = shell.run_batch(["db-stats --limit 1", "db-stats --limit 2"], workers=2)
+
+    assert [0, 0] == [result.code for result in results]
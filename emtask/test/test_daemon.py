@@ -0,0 +1,59 @@
+import io
+import threading
+
+import pytest
+
+from emtask import client
+from emtask.__main__ import make_shell
+from emtask.daemon import DaemonRunningError, EMTaskDaemon
+
+
+@pytest.fixture
+def socket_path(tmp_path):
+    socket_path = str(tmp_path / "emtask.sock")
+    daemon = EMTaskDaemon(lambda: make_shell(persistent_history=False), socket_path)
+    thread = threading.Thread(target=daemon.serve_forever)
+    thread.start()
+    yield socket_path
+    client.send({"stop": True}, socket_path=socket_path)
+    thread.join(5)
+    daemon.server_close()
+
+
+def test_daemon_runs_commands_and_streams_output(socket_path):
+    stdout = io.StringIO()
+
+    code = client.send(
+        {"argv": ["db-stats", "--limit", "1"]}, socket_path=socket_path, stdout=stdout
+    )
+
+    assert 0 == code
+    assert "acquire s" in stdout.getvalue()
+
+
+def test_daemon_reports_errors_and_keeps_serving(socket_path):
+    stderr = io.StringIO()
+
+    assert 2 == client.send(
+        {"argv": ["no_such_command"]}, socket_path=socket_path, stderr=stderr
+    )
+    assert "invalid choice: 'no_such_command'" in stderr.getvalue()
+    assert 2 == client.send(
+        {"argv": ["connect"]}, socket_path=socket_path, stderr=stderr
+    )
+    assert 0 == client.send({"argv": ["db-stats"]}, socket_path=socket_path)
+
+
+def test_second_daemon_refuses_to_take_the_socket(socket_path):
+    with pytest.raises(DaemonRunningError):
+        EMTaskDaemon(lambda: make_shell(persistent_history=False), socket_path)
+
+    assert 0 == client.send({"argv": ["db-stats"]}, socket_path=socket_path)
+
+
+def test_daemon_replaces_a_socket_left_by_a_dead_one(tmp_path):
+    socket_path = str(tmp_path / "emtask.sock")
+    EMTaskDaemon(lambda: None, socket_path).socket.close()  # dies, socket left
+
+    daemon = EMTaskDaemon(lambda: None, socket_path)
+    daemon.server_close()
@@ -0,0 +1,193 @@
+import itertools
+import sqlite3
+
+import pytest
+
+from emtask.database import (
+    ConnectionPool,
+    PooledDatabase,
+    PoolTimeoutError,
+    addb,
+    close_pools,
+)
+from emtask.query_stats import QueryStats
+from emtasktest.sqlitedb import seed_verbs
+from emtasktest.testutils import SampleProjectBuilder
+
+
+class StandInConnection(object):
+    def __init__(self, rows):
+        self.rows = rows
+        self.alive = True
+        self.closed = False
+        self.queries = []
+
+    def cursor(self):
+        return StandInCursor(self)
+
+    def ping(self):
+        if not self.alive:
+            raise ConnectionError("connection lost")
+
+    def commit(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+
+class StandInCursor(object):
+    def __init__(self, connection):
+        self.connection = connection
+        self.description = [("ENTITY_KEYNAME",), ("NAME",)]
+
+    def execute(self, query, params=None):
+        self.connection.queries.append((query, params))
+
+    def fetchmany(self, size):
+        if not hasattr(self, "_rows"):
+            self._rows = iter(self.connection.rows)
+
+        return list(itertools.islice(self._rows, size))
+
+    def __iter__(self):
+        return iter(self.connection.rows)
+
+
+class StandInConnector(object):
+    def __init__(self, rows=()):
+        self.rows = list(rows)
+        self.connections = []
+
+    def connect(self):
+        self.connections.append(StandInConnection(self.rows))
+
+        return self.connections[-1]
+
+
+class FakeClock(object):
+    def __init__(self):
+        self.now = 0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def connector():
+    yield StandInConnector(rows=[("Contact", "inlineView")])
+
+
+@pytest.fixture
+def clock():
+    yield FakeClock()
+
+
+def test_fetch_reuses_pooled_connection(connector):
+    db = PooledDatabase(ConnectionPool(connector.connect))
+
+    assert [{"ENTITY_KEYNAME": "Contact", "NAME": "inlineView"}] == db.fetch("q1")
+    db.fetch("q2", params={"path": "Contact.Verbs.InlineView"})
+
+    assert 1 == len(connector.connections)
+    assert [("q1", None), ("q2", {"path": "Contact.Verbs.InlineView"})] == (
+        connector.connections[0].queries
+    )
+
+
+def test_pool_does_not_open_more_than_max_size(connector):
+    pool = ConnectionPool(connector.connect, max_size=1)
+    pool.acquire()
+
+    with pytest.raises(PoolTimeoutError):
+        pool.acquire(timeout=0.01)
+
+
+def test_connections_idle_for_too_long_are_closed(connector, clock):
+    pool = ConnectionPool(connector.connect, idle_timeout=10, clock=clock)
+    pool.release(pool.acquire())
+    clock.now = 11
+
+    pool.acquire()
+
+    assert connector.connections[0].closed
+    assert 2 == len(connector.connections)
+    assert 1 == pool.size
+
+
+def test_dead_connections_are_replaced(connector, clock):
+    pool = ConnectionPool(connector.connect, ping_after=5, clock=clock)
+    pool.release(pool.acquire())
+    connector.connections[0].alive = False
+    clock.now = 6
+
+    conn = pool.acquire()
+
+    assert connector.connections[0].closed
+    assert connector.connections[1] is conn
+
+
+def test_failing_query_discards_connection(connector):
+    pool = ConnectionPool(connector.connect)
+
+    with pytest.raises(RuntimeError):
+        with pool.connection():
+            raise RuntimeError("ORA-03113")
+
+    assert connector.connections[0].closed
+    assert 0 == pool.size
+
+
+def test_queries_are_recorded_in_query_stats(connector, mocker):
+    stats = QueryStats()
+    mocker.patch("emtask.database.get_query_stats", return_value=stats)
+    db = PooledDatabase(ConnectionPool(connector.connect))
+
+    db.fetch("SELECT * FROM EVA_VERB WHERE NAME = :name", params={"name": "a"})
+    db.fetch("SELECT * FROM EVA_VERB WHERE NAME = :name", params={"name": "b"})
+
+    (summary,) = stats.summaries()
+    assert "SELECT * FROM EVA_VERB WHERE NAME = ?" == summary["fingerprint"]
+    assert (2, 2) == (summary["count"], summary["rows"])
+
+
+def test_iter_fetch_streams_rows_in_batches(connector):
+    connector.rows = [("Contact", "verb{}".format(i)) for i in range(5)]
+    pool = ConnectionPool(connector.connect)
+    db = PooledDatabase(pool)
+
+    rows = db.iter_fetch("SELECT * FROM EVA_VERB", arraysize=2)
+
+    assert ("Contact", "verb0") == next(rows)
+    assert 0 == len(pool._idle)
+    assert 4 == len(list(rows))
+    assert 1 == len(pool._idle)
+
+
+def test_closing_iter_fetch_early_returns_the_connection(connector):
+    pool = ConnectionPool(connector.connect)
+    rows = PooledDatabase(pool).iter_fetch("SELECT * FROM EVA_VERB")
+
+    next(rows)
+    rows.close()
+
+    assert (1, 1) == (pool.size, len(pool._idle))
+
+
+def test_sqlite_database_type_uses_local_stand_in(tmp_path):
+    seed_verbs(sqlite3.connect(str(tmp_path / "verbs.sqlite")), verbs=100)
+    builder = SampleProjectBuilder()
+    builder.append_to_config(
+        database_type="sqlite", database_name=str(tmp_path / "verbs.sqlite")
+    )
+    builder.build()
+    close_pools()
+
+    try:
+        db = addb()
+        rows = db.fetch("SELECT COUNT(*) AS VERBS FROM EVA_VERB")
+        assert db is addb()
+    finally:
+        close_pools()
+
+    assert [{"VERBS": 100}] == rows
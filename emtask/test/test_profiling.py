@@ -0,0 +1,64 @@
+import pstats
+import threading
+import time
+import tracemalloc
+
+from emtask.__main__ import make_shell
+from emtask.profiling import PROFILES_RELPATH, profiled
+from emtasktest.testutils import sample_project
+
+
+def test_profile_flags_write_reports_under_project_work():
+    emproject = sample_project()
+    shell = make_shell(persistent_history=False)
+
+    code = shell.run_command(["emtask", "db-stats", "--profile", "--trace-malloc"])
+
+    assert 0 == code
+    profiles = emproject.root / PROFILES_RELPATH
+    (stats_path,) = profiles.glob("db-stats-*.pstats")
+    assert pstats.Stats(str(stats_path)).total_calls > 0
+    assert "function calls" in next(profiles.glob("*.profile.txt")).read_text()
+    assert "Peak traced memory" in next(profiles.glob("*.malloc.txt")).read_text()
+
+
+def test_commands_run_unprofiled_by_default():
+    emproject = sample_project()
+
+    assert 0 == make_shell(persistent_history=False).run_command(["emtask", "db-stats"])
+    assert not (emproject.root / PROFILES_RELPATH).exists()
+
+
+def test_overlapping_traces_keep_tracemalloc_running(tmp_path):
+    first = profiled("first", trace_malloc=True, output_path=tmp_path)
+    second = profiled("second", trace_malloc=True, output_path=tmp_path)
+    first.__enter__()
+    second.__enter__()
+
+    first.__exit__(None, None, None)
+    assert tracemalloc.is_tracing()
+    second.__exit__(None, None, None)
+
+    assert not tracemalloc.is_tracing()
+    assert 2 == len(list(tmp_path.glob("*.malloc.txt")))
+
+
+def test_overlapping_profiles_run_one_at_a_time(tmp_path):
+    running = []
+    overlapped = []
+
+    def run(name):
+        with profiled(name, profile=True, output_path=tmp_path):
+            running.append(name)
+            time.sleep(0.05)
+            overlapped.append(len(running) > 1)
+            running.remove(name)
+
+    threads = [threading.Thread(target=run, args=(n,)) for n in ("a", "b")]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert [False, False] == overlapped
+    assert 2 == len(list(tmp_path.glob("*.pstats")))
@@ -0,0 +1,34 @@
+import json
+
+from emtask.query_stats import QueryStats, fingerprint
+
+
+def test_fingerprint_ignores_values_and_in_list_length():
+    assert fingerprint(
+        "SELECT * FROM EVA_VERB WHERE NAME IN (:path0, :path1)\n AND ID > 10"
+    ) == fingerprint("SELECT * FROM EVA_VERB WHERE NAME IN (:path0) AND ID > 2")
+    assert "SELECT * FROM T WHERE A = ? AND B = ?" == fingerprint(
+        "SELECT * FROM T WHERE A = 'it''s' AND B = %(b)s"
+    )
+
+
+def test_top_queries_by_total_and_p95():
+    stats = QueryStats()
+
+    for _ in range(99):
+        stats.record("SELECT 1 FROM FAST", 0.001, rows=1)
+    stats.record("SELECT 1 FROM FAST", 2.0, rows=1)
+
+    for _ in range(10):
+        stats.record("SELECT 1 FROM SLOW", 0.05, rows=3, acquire_seconds=0.01)
+
+    fast, slow = stats.top(by="total")
+    assert (100, 100) == (fast["count"], fast["rows"])
+    assert fast["p95"] < 0.002
+    assert 2.0 == fast["max"]
+    assert [slow["fingerprint"]] == [
+        s["fingerprint"] for s in stats.top(by="p95", limit=1)
+    ]
+    assert 0.05 <= slow["p95"] < 0.1
+    assert 0.1 == round(slow["acquire_total"], 6)
+    assert 2 == len(json.loads(stats.to_json())["queries"])
@@ -0,0 +1,9 @@
+from emtasktest import startup
+
+
+def test_shell_startup_defers_command_implementations():
+    modules = startup.measure_startup()
+
+    assert "emtask.ced.nubia_commands" in modules
+    assert [] == startup.deferred_modules_loaded(modules)
+    assert startup.emtask_import_ms(modules) < startup.BUDGET_MS
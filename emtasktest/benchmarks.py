@@ -0,0 +1,429 @@
+"""Benchmarks of the CED object model on synthetic repositories.
+
+It generates a project and a product repository with the requested number of
+processes and times the main operations of emtask.ced on them. Results are
+written as json so runs of different versions can be compared:
+
+    python -m emtasktest.benchmarks --sizes 1000 10000 --output new.json
+    python -m emtasktest.benchmarks --sizes --db-verbs 1000000 --output db.json
+    python -m emtasktest.benchmarks --compare old.json new.json
+"""
+
+import argparse
+import json
+import platform
+import random
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+from emtask import database, project
+from emtask.ced import cache
+from emtask.ced import cedobject_factory as of
+from emtask.ced.index import ClasspathIndex
+from emtask.ced.tool import MultiRootCED
+from emtask.project import EMProject
+from emtask.sql.snapshot import get_verb_snapshot
+from emtask.sql.tasks import VerbDB
+from emtasktest.sqlitedb import seed_verbs
+
+FIELD_TYPES = ["String", "Integer", "Number", "Date", "Decimal", "Character"]
+# share of the generated processes that are customised in the project
+PROJECT_SHARE = 0.1
+
+
+class SyntheticRepositoryBuilder(object):
+    """Generates project and product repositories with processes shaped like
+    those in the product: a few imports, a couple of dozen instance fields,
+    some of them parameters and results, and general procedures"""
+
+    def __init__(
+        self, root, processes=1000, fields=20, imports=5, procedures=2, seed=0
+    ):
+        self.root = Path(root)
+        self.processes = processes
+        self.fields = fields
+        self.imports = imports
+        self.procedures = procedures
+        self._random = random.Random(seed)
+
+    @property
+    def project_root(self):
+        return self.root / "project/repository/default"
+
+    @property
+    def product_root(self):
+        return self.root / "product/repository/default"
+
+    def process_paths(self):
+        return [
+            "Core{0}.Implementation.Entity{1}.Verbs.Verb{2}".format(i % 50, i % 500, i)
+            for i in range(self.processes)
+        ]
+
+    def build(self):
+        paths = self.process_paths()
+        resources = []
+
+        for i, path in enumerate(paths):
+            in_project = i < len(paths) * PROJECT_SHARE
+            root = self.project_root if in_project else self.product_root
+            process = self._make_process(root, path, paths)
+            resources.append(process)
+            resources.extend(process.procedures)
+
+            if len(resources) >= 1000:
+                of.save_all(resources)
+                resources = []
+        of.save_all(resources)
+        ced = MultiRootCED(self.project_root, self.product_root)
+
+        # indexes are kept with the repositories so they are removed together
+        for name, tool in [("project", ced.project_ced), ("product", ced.product_ced)]:
+            tool.index = ClasspathIndex(tool.root, self.root / (name + "_index.json"))
+
+        return ced
+
+    def build_large_process(self, nodes):
+        """Adds to the product a process calling nodes child processes, each
+        with its transition and a data flow carrying scripts, like the
+        biggest product processes. Returns its path"""
+        path = "Core.Implementation.Large.Verbs.Large"
+        process = self._make_process(self.product_root, path, self.process_paths())
+        script = "var value = input.get('field');\n" * 20
+
+        for i in range(nodes):
+            childprocess = of.make_childprocess("Verb{}".format(i), ("0", "0"))
+            name = childprocess.get("name")
+            dataflow = of.make_dataflow("fieldStore0", name, ("0", "0"))
+
+            for _ in range(3):
+                of.make_dataflow_entry(dataflow, "fieldStore0", name, script, "f")
+            process.process_def.extend(
+                [childprocess, of.make_start_transition(name, ("0", "0")), dataflow]
+            )
+        process.save()
+
+        return path
+
+    def _make_process(self, root, path, paths):
+        process = of.make_process(root, path)
+        imported = self._random.sample(paths, min(self.imports, len(paths)))
+        process.add_imports([of.make_import(import_path) for import_path in imported])
+        fields = []
+
+        for i in range(self.fields):
+            if i < len(imported):
+                object_type = imported[i].rsplit(".", 1)[1]
+                fields.append(of.make_object_field(object_type, "object{}".format(i)))
+            else:
+                field_type = self._random.choice(FIELD_TYPES)
+                fields.append(of.make_field(field_type, "field{}".format(i)))
+        process.add_fields(fields)
+        process.mark_all_as_parameters(fields[: self.fields // 2])
+        process.mark_all_as_results(fields[self.fields // 3 :])
+
+        for i in range(self.procedures):
+            process.add_general_procedure("procedure{}".format(i))
+
+        return process
+
+
+def run_benchmarks(ced, paths, operations=1000, seed=0):
+    """Times the CED operations on a random sample of paths, returns one
+    result dict per benchmark"""
+    sample = random.Random(seed).sample(paths, min(operations, len(paths)))
+    results = [
+        _measure(
+            "ClasspathIndex.refresh (cold)",
+            [ced.project_ced, ced.product_ced],
+            lambda tool: tool.index.refresh(),
+        )
+    ]
+    product_sample = [path for path in sample if not ced.project_ced.exists(path)]
+    process_cache = cache.get_process_cache()
+
+    try:
+        cache.set_process_cache(None)
+        results.append(_measure("MultiRootCED.open", sample, ced.open))
+        results.append(_measure("CED.open", product_sample, ced.product_ced.open))
+        cache.set_process_cache(cache.ProcessCache(max_entries=len(sample)))
+        processes = [ced.open(path) for path in sample]
+        results.append(_measure("MultiRootCED.open (cached)", sample, ced.open))
+    finally:
+        cache.set_process_cache(process_cache)
+    results.append(
+        _measure(
+            "summarize",
+            product_sample,
+            lambda path: of.summarize(ced.product_ced, path),
+        )
+    )
+    results.append(
+        _measure(
+            "GenerateProcessWrapper.run",
+            processes,
+            lambda process: process.wrapper(process.path + "Wrapper"),
+        )
+    )
+    results.append(_measure("CEDResource.__str__", processes, str))
+    results.append(_measure("CEDResource.save (unchanged)", processes, _save))
+    results.append(_measure("CEDResource.save (changed)", processes, _touch_and_save))
+
+    return results
+
+
+def run_large_process_benchmarks(ced, path, operations=5):
+    """Compares summarize with a full parse on one large process"""
+    process_cache = cache.get_process_cache()
+    cache.set_process_cache(None)
+
+    try:
+        return [
+            _measure(
+                "CED.open (large process)",
+                [path] * operations,
+                ced.product_ced.open,
+                memory_sample=1,
+            ),
+            _measure(
+                "summarize (large process)",
+                [path] * operations,
+                lambda path: of.summarize(ced.product_ced, path),
+                memory_sample=1,
+            ),
+        ]
+    finally:
+        cache.set_process_cache(process_cache)
+
+
+def run_db_benchmarks(root, verbs, operations=1000, seed=0):
+    """Seeds a sqlite stand-in database under root with verbs and times the
+    VerbDB lookups on it, returns the seconds taken to seed and the results"""
+    root = Path(root)
+    start = time.perf_counter()
+    conn = sqlite3.connect(str(root / "verbs.sqlite"))
+    seed_verbs(conn, verbs=verbs, seed=seed)
+    rows = conn.execute(
+        "SELECT REPOSITORY_PATH FROM EVA_PROCESS_DESCRIPTOR"
+        " ORDER BY RANDOM() LIMIT ?",
+        (operations,),
+    )
+    sample = [path for (path,) in rows]
+    conn.close()
+    seed_seconds = time.perf_counter() - start
+
+    config = root / "work/config/show-config-txt/localdev-localhost-ad.txt"
+    config.parent.mkdir(parents=True)
+    config.write_text("database.type=sqlite\ndatabase.name=verbs.sqlite\n")
+    previous_project = project.get_emproject()
+    project.set_emproject(EMProject(root))
+    prefixes = [path.rsplit(".", 2)[0] + "." for path in sample[:20]]
+    chunks = [sample[i : i + 100] for i in range(0, len(sample), 100)]
+
+    try:
+        results = [
+            _measure("VerbDB.fetch", sample, VerbDB().fetch),
+            _measure("VerbDB.fetch_many (100 paths)", chunks, VerbDB().fetch_many),
+            _measure(
+                "VerbDB.fetch_prefix (entity)",
+                prefixes,
+                lambda prefix: list(VerbDB().fetch_prefix(prefix)),
+            ),
+            _measure(
+                "VerbSnapshot.refresh (full)",
+                [get_verb_snapshot()],
+                lambda snapshot: snapshot.refresh(database.addb(), full=True),
+            ),
+            _measure("VerbDB.fetch (snapshot)", sample, VerbDB().fetch),
+        ]
+    finally:
+        database.close_pools()
+        project.set_emproject(previous_project)
+
+    return seed_seconds, results
+
+
+def _save(process):
+    process.save()
+
+
+def _touch_and_save(process):
+    process.process_def.set("designNotes", str(time.perf_counter()))
+    process.save()
+
+
+def _max_rss_kb():
+    """Process wide peak RSS, None where the resource module is missing
+    (Windows)"""
+    try:
+        import resource
+    except ImportError:
+        return None
+
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def _measure(name, items, operation, memory_sample=100):
+    """Times operation over all items and then traces the python allocations
+    of a smaller sample. Memory allocated by libxml2 is not seen by
+    tracemalloc, max_rss_kb gives the process wide high water mark instead"""
+    start = time.perf_counter()
+
+    for item in items:
+        operation(item)
+    seconds = time.perf_counter() - start
+
+    tracemalloc.start()
+    for item in items[:memory_sample]:
+        operation(item)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "name": name,
+        "operations": len(items),
+        "seconds": seconds,
+        "ops_per_sec": len(items) / seconds if seconds else None,
+        "peak_traced_bytes": peak,
+        "max_rss_kb": _max_rss_kb(),
+    }
+
+
+def run(sizes, operations=1000, workdir=None, keep=False, db_verbs=()):
+    report = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "runs": [],
+    }
+
+    for size in sizes:
+        root = Path(tempfile.mkdtemp(prefix="emtask-bench-", dir=workdir))
+        try:
+            builder = SyntheticRepositoryBuilder(root, processes=size)
+            start = time.perf_counter()
+            ced = builder.build()
+            build_seconds = time.perf_counter() - start
+            results = run_benchmarks(ced, builder.process_paths(), operations)
+            results.extend(
+                run_large_process_benchmarks(
+                    ced, builder.build_large_process(min(size * 3, 3000))
+                )
+            )
+            report["runs"].append(
+                {
+                    "size": size,
+                    "kind": "processes",
+                    "build_seconds": build_seconds,
+                    "results": results,
+                }
+            )
+        finally:
+            if not keep:
+                shutil.rmtree(root)
+
+    for verbs in db_verbs:
+        root = Path(tempfile.mkdtemp(prefix="emtask-bench-db-", dir=workdir))
+        try:
+            build_seconds, results = run_db_benchmarks(root, verbs, operations)
+            report["runs"].append(
+                {
+                    "size": verbs,
+                    "kind": "verbs",
+                    "build_seconds": build_seconds,
+                    "results": results,
+                }
+            )
+        finally:
+            if not keep:
+                shutil.rmtree(root)
+
+    return report
+
+
+def compare(old_report, new_report):
+    """Returns (size, name, old ops/s, new ops/s, ratio) for benchmarks
+    present in both reports"""
+    old_results = {
+        (run["size"], result["name"]): result["ops_per_sec"]
+        for run in old_report["runs"]
+        for result in run["results"]
+    }
+    rows = []
+
+    for run in new_report["runs"]:
+        for result in run["results"]:
+            old = old_results.get((run["size"], result["name"]))
+
+            if old and result["ops_per_sec"]:
+                rows.append(
+                    (
+                        run["size"],
+                        result["name"],
+                        old,
+                        result["ops_per_sec"],
+                        result["ops_per_sec"] / old,
+                    )
+                )
+
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="*", default=[1000])
+    parser.add_argument(
+        "--db-verbs", type=int, nargs="*", default=[], help="sqlite verbs to seed"
+    )
+    parser.add_argument("--operations", type=int, default=1000)
+    parser.add_argument("--output", help="json file the results are written to")
+    parser.add_argument("--workdir", help="where repositories are generated")
+    parser.add_argument("--keep", action="store_true", help="keep repositories")
+    parser.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"))
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        old, new = [json.loads(Path(path).read_text()) for path in args.compare]
+
+        for size, name, old_ops, new_ops, ratio in compare(old, new):
+            print(
+                "{:>7} {:<32} {:>10.0f} {:>10.0f} {:>6.2f}x".format(
+                    size, name, old_ops, new_ops, ratio
+                )
+            )
+
+        return 0
+
+    report = run(args.sizes, args.operations, args.workdir, args.keep, args.db_verbs)
+
+    for run_result in report["runs"]:
+        print(
+            "{} {}, built in {:.1f}s".format(
+                run_result["size"],
+                run_result.get("kind", "processes"),
+                run_result["build_seconds"],
+            )
+        )
+
+        for result in run_result["results"]:
+            print(
+                "  {:<32} {:>10.0f} ops/s  peak {:>8.1f} MB".format(
+                    result["name"],
+                    result["ops_per_sec"] or 0,
+                    result["peak_traced_bytes"] / 2**20,
+                )
+            )
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2))
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
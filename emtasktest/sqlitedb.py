@@ -0,0 +1,143 @@
+"""SQLite databases with the tables queried by emtask for tests and
+benchmarks. A database with a realistic volume of verbs is seeded with:
+
+    python -m emtasktest.sqlitedb verbs.sqlite --verbs 1000000
+
+and used by a project by setting database.type=sqlite and database.name to
+its path.
+"""
+
+import argparse
+import random
+import sqlite3
+import sys
+import time
+
+from emtask.sqlite_database import SCHEMA
+
+VERB_NAMES = [
+    "inlineView",
+    "view",
+    "edit",
+    "create",
+    "delete",
+    "search",
+    "inlineSearch",
+    "print",
+]
+# share of the verbs reusing the process of another verb of the same entity
+SHARED_PROCESS_SHARE = 0.1
+
+
+class SQLiteVerbsDB(object):
+    """In memory database with the subset of the EVA and CCADMIN tables
+    queried by emtask"""
+
+    def __init__(self, database=":memory:"):
+        self.conn = sqlite3.connect(database, check_same_thread=False)
+
+        for statement in SCHEMA:
+            self.conn.execute(statement)
+        self._entities = {}
+
+    def add_verb(self, entity_keyname, name, repository_path):
+        entity_id = self._entities.get(entity_keyname)
+
+        if entity_id is None:
+            entity_id = self._entities[entity_keyname] = len(self._entities) + 1
+            self.conn.execute(
+                "INSERT INTO CCADMIN_IDMAP VALUES (?, 'ED', ?)",
+                (entity_id, entity_keyname),
+            )
+        descriptor_id = self.conn.execute(
+            "INSERT INTO EVA_PROCESS_DESCRIPTOR (REPOSITORY_PATH) VALUES (?)",
+            (repository_path,),
+        ).lastrowid
+        reference_id = self.conn.execute(
+            "INSERT INTO EVA_PROCESS_DESC_REFERENCE (PROCESS_DESCRIPTOR_ID)"
+            " VALUES (?)",
+            (descriptor_id,),
+        ).lastrowid
+        self.conn.execute(
+            "INSERT INTO EVA_VERB (NAME, ENTITY_DEF_ID, PROCESS_DESC_REF_ID)"
+            " VALUES (?, ?, ?)",
+            (name, entity_id, reference_id),
+        )
+
+        return self
+
+    def connect(self):
+        return self.conn
+
+
+def seed_verbs(conn, verbs=1000000, entities=None, batch_size=100000, seed=0):
+    """Inserts verbs spread over entities, about 20 per entity by default,
+    each with its own process except for SHARED_PROCESS_SHARE of them.
+    Expects empty tables, returns the number of verbs inserted"""
+    entities = entities or max(1, verbs // 20)
+    rand = random.Random(seed)
+    conn.execute("PRAGMA journal_mode = OFF")
+    conn.execute("PRAGMA synchronous = OFF")
+
+    with conn:
+        for statement in SCHEMA:
+            conn.execute(statement)
+        conn.executemany(
+            "INSERT INTO CCADMIN_IDMAP VALUES (?, 'ED', ?)",
+            ((i, "Entity{}".format(i)) for i in range(entities)),
+        )
+
+    for start in range(0, verbs, batch_size):
+        descriptors = []
+        verb_rows = []
+
+        for verb_id in range(start, min(start + batch_size, verbs)):
+            entity = verb_id % entities
+            round_, name_index = divmod(verb_id // entities, len(VERB_NAMES))
+            name = VERB_NAMES[name_index] + (str(round_) if round_ else "")
+
+            if verb_id >= entities and rand.random() < SHARED_PROCESS_SHARE:
+                reference_id = verb_id - entities  # previous verb of the entity
+            else:
+                reference_id = verb_id
+                descriptors.append(
+                    (
+                        verb_id,
+                        "Core{}.Implementation.Entity{}.Verbs.{}".format(
+                            entity % 50, entity, name[0].upper() + name[1:]
+                        ),
+                    )
+                )
+            verb_rows.append((verb_id, name, entity, reference_id))
+
+        with conn:
+            conn.executemany(
+                "INSERT INTO EVA_PROCESS_DESCRIPTOR VALUES (?, ?)", descriptors
+            )
+            conn.executemany(
+                "INSERT INTO EVA_PROCESS_DESC_REFERENCE VALUES (?, ?)",
+                ((descriptor_id, descriptor_id) for descriptor_id, _ in descriptors),
+            )
+            conn.executemany("INSERT INTO EVA_VERB VALUES (?, ?, ?, ?)", verb_rows)
+
+    return verbs
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Seeds a sqlite verbs database")
+    parser.add_argument("database", help="sqlite file, created if missing")
+    parser.add_argument("--verbs", type=int, default=1000000)
+    parser.add_argument("--entities", type=int)
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    conn = sqlite3.connect(args.database)
+    seed_verbs(conn, verbs=args.verbs, entities=args.entities)
+    conn.close()
+    print("Seeded {} verbs in {:.1f}s".format(args.verbs, time.perf_counter() - start))
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
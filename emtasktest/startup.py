@@ -0,0 +1,93 @@
+"""Import time of the emtask shell startup.
+
+It loads the command packages the way the shell does, in a new interpreter
+run with -X importtime, and fails when emtask imports take longer than the
+budget or when modules only needed by command implementations are loaded:
+
+    python -m emtasktest.startup --budget-ms 50
+"""
+
+import argparse
+import subprocess
+import sys
+
+STARTUP_SCRIPT = (
+    "from nubia.internal import cmdloader\n"
+    "import emtask.__main__ as main\n"
+    "for package in main.COMMAND_PACKAGES:\n"
+    "    list(cmdloader.load_commands(package))\n"
+)
+# self import time allowed for emtask modules, the shell framework itself
+# is not counted
+BUDGET_MS = 50
+# imported by command implementations only
+DEFERRED_MODULES = ["lxml", "sql_gen", "sqlite3", "emtask.database", "emtask.ced.tool"]
+
+
+def measure_startup(script=STARTUP_SCRIPT):
+    """Returns {module: (self us, cumulative us)} for every module imported
+    by script"""
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", script],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        universal_newlines=True,
+        check=True,
+    )
+    modules = {}
+
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:") :].split("|")
+        modules[name.strip()] = (int(self_us), int(cumulative_us))
+
+    return modules
+
+
+def emtask_import_ms(modules):
+    return (
+        sum(
+            self_us
+            for name, (self_us, _) in modules.items()
+            if name == "emtask" or name.startswith("emtask.")
+        )
+        / 1000
+    )
+
+
+def deferred_modules_loaded(modules):
+    return [
+        name
+        for name in DEFERRED_MODULES
+        if any(module == name or module.startswith(name + ".") for module in modules)
+    ]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--budget-ms", type=float, default=BUDGET_MS)
+    parser.add_argument("--top", type=int, default=15)
+    args = parser.parse_args(argv)
+
+    modules = measure_startup()
+    ranked = sorted(modules.items(), key=lambda item: item[1][1], reverse=True)
+
+    for name, (self_us, cumulative_us) in ranked[: args.top]:
+        print(
+            "{:>10.1f} {:>10.1f}  {}".format(self_us / 1000, cumulative_us / 1000, name)
+        )
+    emtask_ms = emtask_import_ms(modules)
+    loaded = deferred_modules_loaded(modules)
+    print(
+        "emtask imports: {:.1f}ms (budget {:.1f}ms)".format(emtask_ms, args.budget_ms)
+    )
+
+    if loaded:
+        print("Loaded at startup: " + ", ".join(loaded))
+
+    return 1 if loaded or emtask_ms > args.budget_ms else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
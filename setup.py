@@ -24,7 +24,9 @@ setuptools.setup(
             ],
         entry_points = {
             'console_scripts': [
-                'emtask=em.__main__:main'
+                'emtask=em.__main__:main',
+                'emtaskd=emtask.daemon:main',
+                'emtaskc=emtask.client:main',
                 ],
             }
         )